@@ -1,13 +1,28 @@
-import sys
 import random
 import uuid
 import json
+import argparse
+import numpy as np
+import pyarrow as pa
 from datetime import datetime, timedelta
 from faker import Faker
+from functools import partial
+from generator_output import FORMATS, GeneratorOutput
+from generator_pacing import PROFILES, profile_rate, run_paced
+from generator_shards import SHARD_ROWS, resolve_seed, round2, run_shards, shard_rngs, uuid4_ascii
+from raw_schemas import CARBON_SCHEMA, date_array, decimal_array, fixed_width_string_array, records_to_batch
 
 
 fake = Faker()
 
+# reference "now" for the reporting window; None = wall clock.
+# Pin it (--as-of) together with --seed to regenerate identical data later.
+AS_OF = None
+
+
+def current_time():
+    return AS_OF or datetime.utcnow()
+
 # --- Warehouse metadata ---
 warehouses = {
     "WEST_US": {"name": "West Coast USA", "country": "United States"},
@@ -47,20 +62,31 @@ def classify_distance(origin, warehouse_country):
         return "Regional"
     return "Intercontinental"
 
+WAREHOUSE_KEYS = list(warehouses.keys())
+SHIPPING_METHODS = list(shipping_method_factors.keys())
+DISTANCE_CLASSES = list(distance_factors.keys())
+
+# origin x warehouse distance class, computed once instead of per record
+distance_class_by_route = {
+    (origin, wh_key): classify_distance(origin, warehouses[wh_key]["country"])
+    for origin in coffee_origins for wh_key in WAREHOUSE_KEYS
+}
+
 def generate_carbon_report():
-    reporting_month = fake.date_between(start_date="-1y", end_date="today").replace(day=1)
+    today = current_time().date()
+    reporting_month = fake.date_between(start_date=today - timedelta(days=365), end_date=today).replace(day=1)
 
     # choose origin + warehouse
     origin = random.choice(coffee_origins)
-    wh_key = random.choice(list(warehouses.keys()))
+    wh_key = random.choice(WAREHOUSE_KEYS)
     wh = warehouses[wh_key]
 
     # classify transport
-    distance_class = classify_distance(origin, wh["country"])
+    distance_class = distance_class_by_route[(origin, wh_key)]
     distance_factor = distance_factors[distance_class]
 
     # choose method distribution
-    shipping_method = random.choice(list(shipping_method_factors.keys()))
+    shipping_method = random.choice(SHIPPING_METHODS)
     method_factor = shipping_method_factors[shipping_method]
 
     # shipments volume
@@ -75,7 +101,7 @@ def generate_carbon_report():
     )
 
     return {
-        "record_id": str(uuid.uuid4()),
+        "record_id": str(uuid.UUID(int=random.getrandbits(128), version=4)),
         "reporting_month": reporting_month.isoformat(),
         "warehouse_id": wh_key,
         "warehouse_name": wh["name"],
@@ -88,8 +114,188 @@ def generate_carbon_report():
         "estimated_emissions_kgCO2e": estimated_emissions
     }
 
+# ---------------------------------------------------------------------------
+# Columnar path: same rules as generate_carbon_report(), one array operation
+# per column over a whole batch. Categorical fields are integer codes.
+# ---------------------------------------------------------------------------
+
+BATCH_ROWS = 100_000
+
+route_distance_class = np.array([
+    [DISTANCE_CLASSES.index(distance_class_by_route[(o, w)]) for w in WAREHOUSE_KEYS]
+    for o in coffee_origins
+])
+distance_factor_values = np.array([distance_factors[c] for c in DISTANCE_CLASSES])
+method_factor_values = np.array([shipping_method_factors[m] for m in SHIPPING_METHODS])
+
+
+def generate_carbon_batch(n, rng):
+    """Generate n carbon reports as a dict of columns."""
+    today = np.datetime64(current_time().date(), "D")
+    day = today - 365 + rng.integers(0, 366, n)
+    reporting_month = day.astype("datetime64[M]").astype("datetime64[D]")
+
+    origin = rng.integers(0, len(coffee_origins), n)
+    warehouse = rng.integers(0, len(WAREHOUSE_KEYS), n)
+    distance_class = route_distance_class[origin, warehouse]
+    shipping_method = rng.integers(0, len(SHIPPING_METHODS), n)
+    shipments_count = rng.integers(50, 501, n)
+    avg_batch_size = rng.uniform(50, 250, n)
+
+    # same operand order as the scalar formula so the doubles are identical
+    base_unit = 1.0
+    estimated_emissions = round2(
+        base_unit * distance_factor_values[distance_class] * method_factor_values[shipping_method]
+        * shipments_count * (avg_batch_size / 100.0)
+    )
+
+    return {
+        "record_id": uuid4_ascii(rng, n),
+        "reporting_month": reporting_month,
+        "warehouse": warehouse,
+        "origin_country": origin,
+        "distance_class": distance_class,
+        "shipping_method": shipping_method,
+        "shipments_count": shipments_count,
+        "avg_batch_size_kg": round2(avg_batch_size),
+        "estimated_emissions_kgCO2e": estimated_emissions,
+    }
+
+
+def _json_strings(values):
+    return np.array([json.dumps(v) for v in values], dtype=object)
+
+
+# per-warehouse fragment: id, name and country always travel together
+_warehouse_json = np.array([
+    f'"warehouse_id": {json.dumps(w)}, "warehouse_name": {json.dumps(warehouses[w]["name"])}, '
+    f'"warehouse_country": {json.dumps(warehouses[w]["country"])}'
+    for w in WAREHOUSE_KEYS
+], dtype=object)
+
+
+def format_carbon_batch(cols):
+    """Render a column batch as JSON lines identical in shape to generate_carbon_report()."""
+    months, month_code = np.unique(cols["reporting_month"], return_inverse=True)
+    ids = cols["record_id"].tobytes().decode("ascii")
+    columns = [
+        [ids[o:o + 36] for o in range(0, len(ids), 36)],
+        _json_strings(np.datetime_as_string(months))[month_code].tolist(),
+        _warehouse_json[cols["warehouse"]].tolist(),
+        _json_strings(coffee_origins)[cols["origin_country"]].tolist(),
+        _json_strings(DISTANCE_CLASSES)[cols["distance_class"]].tolist(),
+        _json_strings(SHIPPING_METHODS)[cols["shipping_method"]].tolist(),
+        cols["shipments_count"].tolist(),
+        cols["avg_batch_size_kg"].tolist(),
+        cols["estimated_emissions_kgCO2e"].tolist(),
+    ]
+    return "".join([
+        f'{{"record_id": "{a}", "reporting_month": {b}, {c}, "origin_country": {d}, "distance_class": {e}, '
+        f'"shipping_method": {f}, "shipments_count": {g}, "avg_batch_size_kg": {h}, '
+        f'"estimated_emissions_kgCO2e": {i}}}\n'
+        for a, b, c, d, e, f, g, h, i in zip(*columns)
+    ])
+
+
+def carbon_batch_to_arrow(cols):
+    """Same column batch as an Arrow RecordBatch in the RAW carbon table layout."""
+    def lookup(values, codes):
+        return pa.array(values, pa.string()).take(pa.array(codes))
+
+    arrays = [
+        fixed_width_string_array(cols["record_id"]),
+        date_array(cols["reporting_month"].astype(np.int64)),
+        lookup(WAREHOUSE_KEYS, cols["warehouse"]),
+        lookup([warehouses[w]["name"] for w in WAREHOUSE_KEYS], cols["warehouse"]),
+        lookup([warehouses[w]["country"] for w in WAREHOUSE_KEYS], cols["warehouse"]),
+        lookup(coffee_origins, cols["origin_country"]),
+        lookup(DISTANCE_CLASSES, cols["distance_class"]),
+        lookup(SHIPPING_METHODS, cols["shipping_method"]),
+        pa.array(cols["shipments_count"], pa.int64()),
+        decimal_array(cols["avg_batch_size_kg"], CARBON_SCHEMA.field("AVG_BATCH_SIZE_KG").type),
+        decimal_array(cols["estimated_emissions_kgCO2e"], CARBON_SCHEMA.field("ESTIMATED_EMISSIONS_KGCO2E").type),
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=CARBON_SCHEMA)
+
+
+def configure(as_of=None):
+    # also used as the process pool initializer, so workers share the settings
+    global AS_OF
+    AS_OF = as_of
+
+
+def render_carbon_shard(shard, rows, seed, fmt="jsonl"):
+    _, shard_seed = shard_rngs(seed, shard)
+    random.seed(shard_seed)
+    fake.seed_instance(shard_seed)
+    records = [generate_carbon_report() for _ in range(rows)]
+    if fmt == "jsonl":
+        return "".join(json.dumps(r) + "\n" for r in records)
+    return records_to_batch(records, CARBON_SCHEMA)
+
+
+def render_carbon_batch_shard(shard, rows, seed, fmt="jsonl"):
+    rng, _ = shard_rngs(seed, shard)
+    cols = generate_carbon_batch(rows, rng)
+    if fmt == "jsonl":
+        return format_carbon_batch(cols)
+    return carbon_batch_to_arrow(cols)
+
+
+def iter_carbon_reports(total_count, fmt="jsonl", batch_rows=BATCH_ROWS, seed=None, start_shard=0):
+    """Yield reports from the columnar path as JSONL text chunks, or RecordBatches for fmt="arrow".
+
+    For in-process consumers such as s3_insert. Every chunk is one shard of
+    batch_rows rows (the last may be shorter).
+    """
+    render = partial(render_carbon_batch_shard, fmt=fmt)
+    yield from run_shards(render, total_count, batch_rows, 1, resolve_seed(seed), start_shard=start_shard)
+
+
 if __name__ == "__main__":
-    args = sys.argv[1:]
-    total_count = int(args[0]) if args else 10
-    for _ in range(total_count):
-        print(json.dumps(generate_carbon_report()))
+    parser = argparse.ArgumentParser(description="Generate monthly carbon emission reports as JSON lines on stdout")
+    parser.add_argument("total_count", type=int, nargs="?", default=None,
+                        help="number of reports (default 10, or unbounded with --rate)")
+    parser.add_argument("--batch", type=int, nargs="?", const=BATCH_ROWS, default=None, metavar="ROWS",
+                        help=f"columnar generation, ROWS reports per batch (default {BATCH_ROWS})")
+    parser.add_argument("--workers", type=int, default=1, help="generator processes")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for reproducible output (identical for any --workers)")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                        help="reference time instead of now, e.g. 2025-10-01T00:00:00")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl",
+                        help="jsonl text, Arrow IPC stream, or Parquet file (RAW table columns and types)")
+    parser.add_argument("--output", default=None, help="output file (default stdout; required for parquet)")
+    parser.add_argument("--rate", type=float, default=None, metavar="EVENTS_PER_SEC",
+                        help="stream continuously at this rate (total_count becomes an optional cap)")
+    parser.add_argument("--profile", choices=PROFILES, default="constant", help="burst profile for --rate")
+    parser.add_argument("--period", type=float, default=60.0, help="burst profile period in seconds")
+    parser.add_argument("--burst", type=float, default=3.0, help="peak rate as a multiple of --rate")
+    parser.add_argument("--duration", type=float, default=0, help="stop streaming after this many seconds")
+    args = parser.parse_args()
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet needs --output")
+
+    configure(args.as_of)
+    seed = resolve_seed(args.seed)
+    if args.batch:
+        render, shard_rows = render_carbon_batch_shard, args.batch
+    else:
+        render, shard_rows = render_carbon_shard, SHARD_ROWS
+    out = GeneratorOutput(args.format, CARBON_SCHEMA, args.output)
+    if args.rate:
+        def write(part):
+            out.write(part)
+            out.flush()
+
+        run_paced(
+            partial(render, seed=seed, fmt=args.format),
+            lambda t: profile_rate(args.profile, args.rate, t, args.period, args.burst),
+            write, max_events=args.total_count or 0, duration=args.duration,
+        )
+    else:
+        total_count = args.total_count if args.total_count is not None else 10
+        for part in run_shards(partial(render, fmt=args.format), total_count, shard_rows,
+                               args.workers, seed, initializer=configure, initargs=(args.as_of,)):
+            out.write(part)
+    out.close()
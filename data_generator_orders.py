@@ -1,4 +1,7 @@
+import os
 import sys
+import argparse
+import numpy as np
 import rapidjson as json
 import optional_faker as _
 import uuid
@@ -8,12 +11,27 @@ import random
 from dotenv import load_dotenv
 
 load_dotenv()
-import random, uuid, json, sys
+import mmap, random, re, uuid, json, sys
+from array import array
 from datetime import datetime, timedelta, date
-from faker import Faker
+from faker import VERSION as FAKER_VERSION, Faker
+from functools import lru_cache, partial
+import pyarrow as pa
+from generator_output import FORMATS, GeneratorOutput
+from generator_pacing import PROFILES, profile_rate, run_paced
+from generator_shards import SHARD_ROWS, resolve_seed, run_shards, shard_rngs, uuid4_strings
+from raw_schemas import ORDERS_SCHEMA, date_array, decimal_array, records_to_batch
 
 fake = Faker()
 
+# reference "now" for purchase dates and order age; None = wall clock.
+# Pin it (--as-of) together with --seed to regenerate identical data later.
+AS_OF = None
+
+
+def current_time():
+    return AS_OF or datetime.utcnow()
+
 # full inventory price map
 price_map = {
     "Signature House Blend": 12.99,
@@ -114,29 +132,251 @@ def assign_warehouse(region):
     wh = warehouses[choice]
     return wh["name"], wh["country"]
 
-def generate_address(region):
+# ---------------------------------------------------------------------------
+# Customer pool: identities are generated with Faker once, saved as a
+# fixed-width structured .npy file and memory-mapped on later runs. Orders
+# draw customers from it with a Zipf-like skew so repeat purchases happen.
+# What the pool was built from (size, --seed, Faker locales and version) is
+# kept next to it in <path>.json; a pool built from anything else is rebuilt,
+# so the same --seed always draws from the same customers.
+# ---------------------------------------------------------------------------
+
+CUSTOMER_POOL_PATH = "customer_pool.npy"
+CUSTOMER_POOL_SIZE = 100_000
+CUSTOMER_SKEW = 0.8   # 0 = uniform, higher = more orders from top customers
+
+CUSTOMER_FIELDS = ["customer_id", "name", "email", "phone", "street_address", "city", "postalcode"]
+
+_customer_pool = None
+_customer_cdf = None
+
+
+def customer_pool_key(size, seed):
+    return {"size": size, "seed": seed, "locales": list(fake.locales), "faker": FAKER_VERSION}
+
+
+def customer_pool_mismatch(path, key):
+    """Why the pool at path cannot be used for key, or None if it can."""
+    if not os.path.exists(path):
+        return "not built yet"
+    try:
+        with open(f"{path}.json") as fh:
+            built = json.load(fh)
+    except (OSError, ValueError):
+        return "built by an older generator"
+    if key["seed"] is None:
+        built["seed"] = None    # unseeded runs take any pool of the right kind
+    if built != key:
+        changed = ", ".join(f"{k} {built.get(k)!r} -> {v!r}" for k, v in key.items() if built.get(k) != v)
+        return f"built for {changed}"
+    return None
+
+
+def build_customer_pool(path, size, key):
+    emails = [fake.email() for _ in range(size)]
+    values = {
+        "customer_id": [str(uuid.uuid5(uuid.NAMESPACE_DNS, e)) for e in emails],
+        "name": [fake.name() for _ in range(size)],
+        "email": emails,
+        "phone": [fake.phone_number() for _ in range(size)],
+        "street_address": [fake.street_address() for _ in range(size)],
+        "city": [fake.city() for _ in range(size)],
+        "postalcode": [fake.postcode() for _ in range(size)],
+    }
+    encoded = {f: [v.encode("utf-8") for v in values[f]] for f in CUSTOMER_FIELDS}
+    dtype = [(f, f"S{max(len(v) for v in encoded[f])}") for f in CUSTOMER_FIELDS]
+    pool = np.empty(size, dtype=dtype)
+    for f in CUSTOMER_FIELDS:
+        pool[f] = encoded[f]
+
+    # write then rename so a concurrent reader never maps a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        np.save(fh, pool)
+    os.replace(tmp_path, path)
+    with open(tmp_path, "w") as fh:
+        json.dump(key, fh)
+    os.replace(tmp_path, f"{path}.json")
+
+
+def load_customer_pool(path=CUSTOMER_POOL_PATH, size=CUSTOMER_POOL_SIZE, skew=CUSTOMER_SKEW, seed=None):
+    global _customer_pool, _customer_cdf
+    key = customer_pool_key(size, seed)
+    mismatch = customer_pool_mismatch(path, key)
+    if mismatch:
+        sys.stderr.write(f"Building customer pool of {size} at {path} ({mismatch})...\n")
+        if seed is not None:
+            fake.seed_instance(seed)
+        build_customer_pool(path, size, key)
+    pool = np.load(path, mmap_mode="r")
+
+    _customer_pool = pool
+    _customer_cdf = zipf_cdf(size, skew)
+
+
+def customer_pool():
+    if _customer_pool is None:
+        load_customer_pool()
+    return _customer_pool
+
+
+def sample_customers(u):
+    # u: uniform draw(s) in [0, 1) -> pool index(es) under the skewed weights
+    customer_pool()
+    return sample_cdf(_customer_cdf, u)
+
+
+# ---------------------------------------------------------------------------
+# Skewed and seasonal distributions. Every draw goes through a CDF so the
+# scalar path (one uniform) and the batch path (an array of uniforms) share
+# the same weights. Defaults are uniform / flat.
+# ---------------------------------------------------------------------------
+
+ITEMS = list(price_map.keys())
+REGION_NAMES = list(regions.keys())
+
+ITEM_SKEW = 0.0      # Zipf exponent over the catalogue order (0 = uniform)
+SEASONALITY = 0.0    # height of the seasonal peaks above the base level (0 = flat)
+
+# (day of year, width in days, relative height): holiday season and a spring promotion
+SEASONAL_PEAKS = [(340, 18, 1.0), (130, 10, 0.4)]
+
+
+def zipf_cdf(n, skew):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def weights_cdf(weights):
+    cdf = np.cumsum(np.asarray(weights, dtype=np.float64))
+    return cdf / cdf[-1]
+
+
+def sample_cdf(cdf, u):
+    return np.minimum(np.searchsorted(cdf, u, side="right"), len(cdf) - 1)
+
+
+_item_cdf = zipf_cdf(len(ITEMS), ITEM_SKEW)
+_region_cdf = weights_cdf(np.ones(len(REGION_NAMES)))
+
+
+def configure_distributions(item_skew=ITEM_SKEW, seasonality=SEASONALITY, region_weights=None):
+    global ITEM_SKEW, SEASONALITY, _item_cdf, _region_cdf
+    ITEM_SKEW = item_skew
+    SEASONALITY = seasonality
+    _item_cdf = zipf_cdf(len(ITEMS), item_skew)
+    region_weights = region_weights or {}
+    _region_cdf = weights_cdf([region_weights.get(r, 1.0) for r in REGION_NAMES])
+
+
+def parse_region_weights(text):
+    # "Europe=3,Asia=0.5" -> {"Europe": 3.0, "Asia": 0.5}
+    weights = {}
+    for part in filter(None, text.split(",")):
+        name, _, value = part.partition("=")
+        if name.strip() not in regions:
+            raise argparse.ArgumentTypeError(f"unknown region {name.strip()!r}")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+@lru_cache(maxsize=8)
+def purchase_day_cdf(start_date, n_days, last_day_fraction, seasonality):
+    days = np.datetime64(start_date) + np.arange(n_days)
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64) + 1
+    weights = np.ones(n_days)
+    for peak, width, height in SEASONAL_PEAKS:
+        distance = np.abs(day_of_year - peak)
+        distance = np.minimum(distance, 365 - distance)
+        weights += seasonality * height * np.exp(-0.5 * (distance / width) ** 2)
+    # the current day is only partly elapsed
+    weights[-1] *= last_day_fraction
+    return weights_cdf(weights)
+
+
+def sample_purchase_seconds(span_seconds, start_dt, u_day, u_second):
+    """Seconds after start_dt in [0, span_seconds]: day from the seasonal curve, second uniform within it."""
+    n_days = span_seconds // 86400 + 1
+    last_day_len = span_seconds - (n_days - 1) * 86400 + 1
+    cdf = purchase_day_cdf(start_dt.date(), n_days, last_day_len / 86400, SEASONALITY)
+    day = sample_cdf(cdf, u_day)
+    day_len = np.where(day == n_days - 1, last_day_len, 86400)
+    return day * 86400 + (u_second * day_len).astype(np.int64)
+
+
+def generate_address(region, customer):
     country = random.choice(regions[region])
     return {
-        "street_address": fake.street_address(),
-        "city": fake.city(),
+        "street_address": customer["street_address"].decode("utf-8"),
+        "city": customer["city"].decode("utf-8"),
         "country": country,
-        "postalcode": fake.postcode()
+        "postalcode": customer["postalcode"].decode("utf-8")
     }
 
-def print_client_support():
+def compute_carbon_score(dest_country, warehouse_country, shipping_method, size, quantity, delivery_status):
+    # carbon score (kg CO2) — depends on distance, method, size, quantity, and status
+    # distance factor from warehouse_country to address country
+    wh_region = find_region_for_country(warehouse_country) or "Unknown"
+    dest_region = find_region_for_country(dest_country) or "Unknown"
+
+    if dest_country == warehouse_country:
+        distance_factor = 0.2            # same-country, very low
+    elif wh_region == dest_region:
+        distance_factor = 1.0            # same-region/continent
+    else:
+        distance_factor = 1.8            # inter-regional
+
+    # shipping method factor
+    if shipping_method == "Local Pickup":
+        method_factor = 0.2
+    elif shipping_method == "EcoDelivery":
+        method_factor = 0.8
+    elif shipping_method == "Express":
+        method_factor = 1.4
+    else:  # Standard
+        method_factor = 1.0
+
+    # size factor
+    size_factor = 0.0
+    if size == "500g":
+        size_factor = 0.15
+    elif size == "1kg":
+        size_factor = 0.35
+
+    # status multiplier
+    # - Canceled: lower (not shipped or minimal handling)
+    # - Returned: higher (two legs)
+    # - Delivered/In Transit: normal
+    if delivery_status == "Canceled":
+        status_multiplier = 0.3
+    elif delivery_status == "Returned":
+        status_multiplier = 2.0
+    else:
+        status_multiplier = 1.0
+
+    # base unit, then scale by factors and quantity
+    base_unit = 1.0
+    carbon_score = base_unit * distance_factor * method_factor * (1 + size_factor) * quantity * status_multiplier
+    return round(carbon_score, 2)
+
+
+def generate_client_support():
     start_dt = datetime(2023, 1, 1)
-    end_dt = datetime.utcnow()
-    random_seconds = random.randint(0, int((end_dt - start_dt).total_seconds()))
+    end_dt = current_time()
+    random_seconds = int(sample_purchase_seconds(
+        int((end_dt - start_dt).total_seconds()), start_dt, random.random(), random.random()
+    ))
     purchase_dt = start_dt + timedelta(seconds=random_seconds)
-    purchase_time_iso = purchase_dt.isoformat()
 
     # pick region first, then country from that region, then warehouse based on region
-    region = random.choice(list(regions.keys()))
-    address = generate_address(region)
+    region = REGION_NAMES[int(sample_cdf(_region_cdf, random.random()))]
+    customer = customer_pool()[int(sample_customers(random.random()))]
+    address = generate_address(region, customer)
     warehouse_name, warehouse_country = assign_warehouse(region)
 
     # pick one item
-    item_name = random.choice(list(price_map.keys()))
+    item_name = ITEMS[int(sample_cdf(_item_cdf, random.random()))]
     base_price = price_map[item_name]
     quantity = random.randint(1, 3)
 
@@ -168,18 +408,17 @@ def print_client_support():
         allowed_methods = [m for m in allowed_methods if m != "Local Pickup"]
     shipping_method = random.choice(allowed_methods)
 
-    order_age_days = (datetime.utcnow() - purchase_dt).days
+    order_age_days = (end_dt - purchase_dt).days
     status_options = ["Delivered", "Returned", "Canceled"]
     if order_age_days <= 30:
         status_options.append("In Transit")
     delivery_status = random.choice(status_options)
 
-    # customer_id: deterministic by email for dedup
-    # generate email first to make ID stable across duplicates
-    name = fake.name()
-    email = fake.email()
-    phone = fake.phone_number()
-    customer_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, email))
+    # customer from the pool; customer_id is deterministic by email for dedup
+    name = customer["name"].decode("utf-8")
+    email = customer["email"].decode("utf-8")
+    phone = customer["phone"].decode("utf-8")
+    customer_id = customer["customer_id"].decode("utf-8")
 
     # product_id: deterministic by product name
     product_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, item_name))
@@ -190,50 +429,9 @@ def print_client_support():
     organic_certified = is_coffee_or_tea and ("Organic" in item_name or random.random() < 0.5)
 
     # carbon score (kg CO2) — depends on distance, method, size, quantity, and status
-    # distance factor from warehouse_country to address country
-    dest_country = address["country"]
-    wh_region = find_region_for_country(warehouse_country) or "Unknown"
-    dest_region = find_region_for_country(dest_country) or "Unknown"
-
-    if dest_country == warehouse_country:
-        distance_factor = 0.2            # same-country, very low
-    elif wh_region == dest_region:
-        distance_factor = 1.0            # same-region/continent
-    else:
-        distance_factor = 1.8            # inter-regional
-
-    # shipping method factor
-    if shipping_method == "Local Pickup":
-        method_factor = 0.2
-    elif shipping_method == "EcoDelivery":
-        method_factor = 0.8
-    elif shipping_method == "Express":
-        method_factor = 1.4
-    else:  # Standard
-        method_factor = 1.0
-
-    # size factor
-    size_factor = 0.0
-    if size == "500g":
-        size_factor = 0.15
-    elif size == "1kg":
-        size_factor = 0.35
-
-    # status multiplier
-    # - Canceled: lower (not shipped or minimal handling)
-    # - Returned: higher (two legs)
-    # - Delivered/In Transit: normal
-    if delivery_status == "Canceled":
-        status_multiplier = 0.3
-    elif delivery_status == "Returned":
-        status_multiplier = 2.0
-    else:
-        status_multiplier = 1.0
-
-    # base unit, then scale by factors and quantity
-    base_unit = 1.0
-    carbon_score = base_unit * distance_factor * method_factor * (1 + size_factor) * quantity * status_multiplier
-    carbon_score = round(carbon_score, 2)
+    carbon_score = compute_carbon_score(
+        address["country"], warehouse_country, shipping_method, size, quantity, delivery_status
+    )
 
     # timestamps: shipped/delivered with constraints
     shipped_dt = None
@@ -273,7 +471,7 @@ def print_client_support():
         delivery_delay_days = (delivered_dt - purchase_dt).days
 
     client_support = {
-        "txid": str(uuid.uuid4()),
+        "txid": str(uuid.UUID(int=random.getrandbits(128), version=4)),
         "rfid": hex(random.getrandbits(96)),
         "customer_id": customer_id,
         "product_id": product_id,
@@ -305,13 +503,527 @@ def print_client_support():
         "carbon_score": carbon_score
     }
 
-    d = json.dumps(client_support) + "\n"
+    return client_support
+
+
+def print_client_support():
+    d = json.dumps(generate_client_support()) + "\n"
     sys.stdout.write(d)
 
 
+# ---------------------------------------------------------------------------
+# Batch mode: the same business rules as print_client_support(), evaluated a
+# whole column at a time with NumPy. Categorical fields are kept as integer
+# codes into the lookup tables below and only turned into text on output.
+# ---------------------------------------------------------------------------
+
+BATCH_ROWS = 100_000
+
+COUNTRIES = [c for r in REGION_NAMES for c in regions[r]]
+WAREHOUSE_KEYS = list(warehouses.keys())
+WAREHOUSE_NAMES = [warehouses[w]["name"] for w in WAREHOUSE_KEYS]
+BAG_SIZES = ["250g", "500g", "1kg", "N/A"]
+SHIPPING_METHODS = ["Standard", "Express", "EcoDelivery", "Local Pickup"]
+DELIVERY_STATUSES = ["Delivered", "Returned", "Canceled", "In Transit"]
+PAYMENT_METHODS = ["Credit Card", "PayPal", "Gift Card", "Apple Pay", "Google Pay"]
+PAYMENT_STATUSES = ["Paid", "Refunded", "Pending"]
+SINGLE_ORIGINS = [
+    "Ethiopia", "Kenya", "Colombia", "Guatemala", "Peru",
+    "Brazil", "Costa Rica", "Honduras", "Rwanda"
+]
+ORIGINS = sorted(set(origin_map.values()) | set(SINGLE_ORIGINS) | {"N/A"})
+
+# per-item attributes
+item_is_coffee = np.array([i in coffee_items for i in ITEMS])
+item_is_organic = np.array(["Organic" in i for i in ITEMS])
+item_is_single_origin = np.array([i == "Single-Origin Spotlight Blend" for i in ITEMS])
+item_origin = np.array([ORIGINS.index(origin_map.get(i, "N/A")) for i in ITEMS])
+single_origin_codes = np.array([ORIGINS.index(o) for o in SINGLE_ORIGINS])
+item_product_id = [str(uuid.uuid5(uuid.NAMESPACE_DNS, i)) for i in ITEMS]
+
+# country picked uniformly within its region: offset + floor(u * count)
+region_country_offset = np.cumsum([0] + [len(regions[r]) for r in REGION_NAMES[:-1]])
+region_country_count = np.array([len(regions[r]) for r in REGION_NAMES])
+country_region = np.array([REGION_NAMES.index(find_region_for_country(c)) for c in COUNTRIES])
+
+# warehouse per region: Americas split between WEST_US / EAST_US, the rest fixed
+region_is_americas = np.array([r in ["North America", "South America"] for r in REGION_NAMES])
+region_fixed_warehouse = np.array([
+    WAREHOUSE_KEYS.index("PARIS_FR") if r in ["Europe", "Africa"] else WAREHOUSE_KEYS.index("ASIA_HUB")
+    for r in REGION_NAMES
+])
+
+# country x warehouse -> same country (Local Pickup allowed) and distance class
+# 0 = same country, 1 = same region/continent, 2 = inter-regional
+same_country = np.array([[c == warehouses[w]["country"] for w in WAREHOUSE_KEYS] for c in COUNTRIES])
+distance_class = np.array([
+    [
+        0 if c == warehouses[w]["country"]
+        else 1 if (find_region_for_country(warehouses[w]["country"]) or "Unknown") == find_region_for_country(c)
+        else 2
+        for w in WAREHOUSE_KEYS
+    ]
+    for c in COUNTRIES
+])
+
+# status -> payment status
+status_payment = np.array([
+    PAYMENT_STATUSES.index("Paid"),      # Delivered
+    PAYMENT_STATUSES.index("Refunded"),  # Returned
+    PAYMENT_STATUSES.index("Refunded"),  # Canceled
+    PAYMENT_STATUSES.index("Pending"),   # In Transit
+])
+
+# prices: item x bag size (x quantity), rounded exactly like the scalar path
+unit_price_table = np.array([
+    [round(price_map[i] * bag_size_multiplier[s], 2) for s in BAG_SIZES] for i in ITEMS
+])
+total_price_table = np.array([
+    [[round(unit_price_table[a, b] * q, 2) for q in range(4)] for b in range(len(BAG_SIZES))]
+    for a in range(len(ITEMS))
+])
+
+# carbon score: distance x method x size x quantity x status
+_distance_factors = [0.2, 1.0, 1.8]
+_method_factors = [1.0, 1.4, 0.8, 0.2]
+_size_factors = [0.0, 0.15, 0.35, 0.0]
+_status_multipliers = [1.0, 2.0, 0.3, 1.0]
+carbon_score_table = np.array([
+    [
+        [
+            [
+                [round(1.0 * df * mf * (1 + sf) * q * sm, 2) for sm in _status_multipliers]
+                for q in range(4)
+            ]
+            for sf in _size_factors
+        ]
+        for mf in _method_factors
+    ]
+    for df in _distance_factors
+])
+
+def _rfid_strings(rng, n):
+    h = rng.bytes(12 * n).hex()
+    return ["0x" + (h[o:o + 24].lstrip("0") or "0") for o in range(0, 24 * n, 24)]
+
+
+def _pick(rng, n, counts):
+    # uniform index in [0, counts) where counts may vary per row
+    return (rng.random(n) * counts).astype(np.int64)
+
+
+def generate_client_support_batch(n, rng):
+    """Generate n orders as a dict of columns (codes into the tables above)."""
+    start_dt = datetime(2023, 1, 1)
+    end_dt = current_time()
+    span = (end_dt - start_dt).total_seconds()
+    purchase_seconds = sample_purchase_seconds(int(span), start_dt, rng.random(n), rng.random(n))
+    purchase_day = purchase_seconds // 86400
+    order_age_days = np.floor((span - purchase_seconds) / 86400).astype(np.int64)
+
+    region = sample_cdf(_region_cdf, rng.random(n))
+    country = region_country_offset[region] + _pick(rng, n, region_country_count[region])
+    warehouse = np.where(region_is_americas[region], rng.integers(0, 2, n), region_fixed_warehouse[region])
+
+    item = sample_cdf(_item_cdf, rng.random(n))
+    quantity = rng.integers(1, 4, n)
+    is_coffee = item_is_coffee[item]
+    origin = np.where(
+        item_is_single_origin[item],
+        single_origin_codes[rng.integers(0, len(SINGLE_ORIGINS), n)],
+        item_origin[item],
+    )
+    bag_size = np.where(is_coffee, rng.integers(0, 3, n), 3)
+
+    # Local Pickup is the last method, so dropping it is a smaller range
+    shipping_method = _pick(rng, n, np.where(same_country[country, warehouse], 4, 3))
+    # In Transit is the last status, only allowed for orders up to 30 days old
+    delivery_status = _pick(rng, n, np.where(order_age_days <= 30, 4, 3))
+
+    fair_trade = is_coffee & (rng.random(n) < 0.8)
+    organic = is_coffee & (item_is_organic[item] | (rng.random(n) < 0.5))
+
+    # shipped 0-5 days after purchase when in transit, 0-3 when delivered/returned;
+    # delivered 1-20 days after shipped, bounded by the order age
+    in_transit = delivery_status == 3
+    completed = delivery_status <= 1
+    ship_days = np.where(in_transit, rng.integers(0, 6, n), rng.integers(0, 4, n))
+    deliver_cap = np.clip(order_age_days - ship_days, 1, 20)
+    deliver_days = 1 + _pick(rng, n, deliver_cap)
+    shipped_day = np.where(in_transit | completed, purchase_day + ship_days, -1)
+    delivered_day = np.where(completed, shipped_day + deliver_days, -1)
+    delivery_delay_days = np.where(completed, ship_days + deliver_days, -1)
+
+    return {
+        "start_date": start_dt.date(),
+        "txid": uuid4_strings(rng, n),
+        "rfid": _rfid_strings(rng, n),
+        "customer": sample_customers(rng.random(n)),
+        "item": item,
+        "bag_size": bag_size,
+        "unit_price": unit_price_table[item, bag_size],
+        "quantity": quantity,
+        "total_price": total_price_table[item, bag_size, quantity],
+        "origin_country": origin,
+        "fair_trade_certified": fair_trade,
+        "organic_certified": organic,
+        "purchase_day": purchase_day,
+        "shipped_day": shipped_day,
+        "delivered_day": delivered_day,
+        "region": region,
+        "country": country,
+        "payment_method": rng.integers(0, len(PAYMENT_METHODS), n),
+        "payment_status": status_payment[delivery_status],
+        "warehouse": warehouse,
+        "shipping_method": shipping_method,
+        "delivery_status": delivery_status,
+        "delivery_delay_days": delivery_delay_days,
+        "carbon_score": carbon_score_table[
+            distance_class[country, warehouse], shipping_method, bag_size, quantity, delivery_status
+        ],
+    }
+
+
+def _json_strings(values):
+    return np.array([json.dumps(v) for v in values], dtype=object)
+
+
+def _customer_columns(customer):
+    # encode each distinct customer of the batch once, then fan out
+    uniq, inverse = np.unique(customer, return_inverse=True)
+    rows = customer_pool()[uniq]
+    cols = {"customer_id": np.array([v.decode("utf-8") for v in rows["customer_id"].tolist()], dtype=object)[inverse]}
+    for f in CUSTOMER_FIELDS[1:]:
+        cols[f] = _json_strings([v.decode("utf-8") for v in rows[f].tolist()])[inverse]
+    return cols
+
+
+def format_client_support_batch(cols):
+    """Render a column batch as JSON lines identical in shape to print_client_support()."""
+    ids = _customer_columns(cols["customer"])
+
+    # dates as day offsets; index -1 (missing) hits the trailing null
+    last_day = int(max(cols["purchase_day"].max(), cols["delivered_day"].max(), cols["shipped_day"].max()))
+    days = np.datetime64(cols["start_date"]) + np.arange(last_day + 1)
+    date_json = np.append(_json_strings(np.datetime_as_string(days)), "null")
+    delay_json = np.array([str(d) for d in range(int(cols["delivery_delay_days"].max()) + 1)] + ["null"], dtype=object)
+    bool_json = np.array(["false", "true"], dtype=object)
+
+    columns = [
+        cols["txid"],
+        cols["rfid"],
+        ids["customer_id"],
+        np.array(item_product_id, dtype=object)[cols["item"]],
+        _json_strings(ITEMS)[cols["item"]],
+        _json_strings(BAG_SIZES)[cols["bag_size"]],
+        cols["unit_price"].tolist(),
+        cols["quantity"].tolist(),
+        cols["total_price"].tolist(),
+        _json_strings(ORIGINS)[cols["origin_country"]],
+        bool_json[cols["fair_trade_certified"].astype(np.int8)],
+        bool_json[cols["organic_certified"].astype(np.int8)],
+        date_json[cols["purchase_day"]],
+        date_json[cols["shipped_day"]],
+        date_json[cols["delivered_day"]],
+        _json_strings(REGION_NAMES)[cols["region"]],
+        ids["name"],
+        ids["street_address"],
+        ids["city"],
+        _json_strings(COUNTRIES)[cols["country"]],
+        ids["postalcode"],
+        ids["phone"],
+        ids["email"],
+        _json_strings(PAYMENT_METHODS)[cols["payment_method"]],
+        _json_strings(PAYMENT_STATUSES)[cols["payment_status"]],
+        _json_strings(WAREHOUSE_NAMES)[cols["warehouse"]],
+        _json_strings(SHIPPING_METHODS)[cols["shipping_method"]],
+        _json_strings(DELIVERY_STATUSES)[cols["delivery_status"]],
+        delay_json[cols["delivery_delay_days"]],
+        cols["carbon_score"].tolist(),
+    ]
+    columns = [c.tolist() if isinstance(c, np.ndarray) else c for c in columns]
+    return "".join([
+        f'{{"txid": "{a}", "rfid": "{b}", "customer_id": "{c}", "product_id": "{d}", "item": {e}, '
+        f'"bag_size": {f}, "unit_price": {g}, "quantity": {h}, "total_price": {i}, "origin_country": {j}, '
+        f'"fair_trade_certified": {k}, "organic_certified": {l}, "purchase_time": {m}, "shipped_date": {o}, '
+        f'"delivered_date": {p}, "region": {q}, "name": {r}, "street_address": {s}, "city": {t}, '
+        f'"country": {u}, "postalcode": {v}, "phone": {w}, "email": {x}, "payment_method": {y}, '
+        f'"payment_status": {z}, "warehouse": {aa}, "shipping_method": {bb}, "delivery_status": {cc}, '
+        f'"delivery_delay_days": {dd}, "carbon_score": {ee}}}\n'
+        for a, b, c, d, e, f, g, h, i, j, k, l, m, o, p, q, r, s, t, u, v, w, x, y, z, aa, bb, cc, dd, ee
+        in zip(*columns)
+    ])
+
+
+def client_support_batch_to_arrow(cols):
+    """Same column batch as an Arrow RecordBatch in the RAW orders table layout."""
+    uniq, inverse = np.unique(cols["customer"], return_inverse=True)
+    rows = customer_pool()[uniq]
+    inverse = pa.array(inverse)
+    epoch_offset = (cols["start_date"] - date(1970, 1, 1)).days
+
+    def customer(field):
+        return pa.array([v.decode("utf-8") for v in rows[field].tolist()], pa.string()).take(inverse)
+
+    def lookup(values, codes):
+        return pa.array(values, pa.string()).take(pa.array(codes))
+
+    def day(name):
+        return date_array(cols[name] + epoch_offset, cols[name] < 0)
+
+    def price(name, column):
+        return decimal_array(cols[name], ORDERS_SCHEMA.field(column).type)
+
+    arrays = [
+        pa.array(cols["txid"], pa.string()),
+        pa.array(cols["rfid"], pa.string()),
+        customer("customer_id"),
+        lookup(item_product_id, cols["item"]),
+        lookup(ITEMS, cols["item"]),
+        lookup(BAG_SIZES, cols["bag_size"]),
+        price("unit_price", "UNIT_PRICE"),
+        pa.array(cols["quantity"], pa.int64()),
+        price("total_price", "TOTAL_PRICE"),
+        lookup(ORIGINS, cols["origin_country"]),
+        pa.array(cols["fair_trade_certified"]),
+        pa.array(cols["organic_certified"]),
+        day("purchase_day"),
+        day("shipped_day"),
+        day("delivered_day"),
+        lookup(REGION_NAMES, cols["region"]),
+        customer("name"),
+        customer("street_address"),
+        customer("city"),
+        lookup(COUNTRIES, cols["country"]),
+        customer("postalcode"),
+        customer("phone"),
+        customer("email"),
+        lookup(WAREHOUSE_NAMES, cols["warehouse"]),
+        lookup(SHIPPING_METHODS, cols["shipping_method"]),
+        lookup(DELIVERY_STATUSES, cols["delivery_status"]),
+        lookup(PAYMENT_METHODS, cols["payment_method"]),
+        lookup(PAYMENT_STATUSES, cols["payment_status"]),
+        pa.array(cols["delivery_delay_days"], pa.int64(), mask=cols["delivery_delay_days"] < 0),
+        price("carbon_score", "CARBON_SCORE"),
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=ORDERS_SCHEMA)
+
+
+def configure(pool_path=CUSTOMER_POOL_PATH, pool_size=CUSTOMER_POOL_SIZE, skew=CUSTOMER_SKEW, as_of=None, seed=None,
+              item_skew=ITEM_SKEW, seasonality=SEASONALITY, region_weights=None):
+    # also used as the process pool initializer, so workers share the settings
+    global AS_OF
+    AS_OF = as_of
+    load_customer_pool(pool_path, pool_size, skew, seed)
+    configure_distributions(item_skew, seasonality, region_weights)
+
+
+def render_client_support_shard(shard, rows, seed, fmt="jsonl"):
+    _, shard_seed = shard_rngs(seed, shard)
+    random.seed(shard_seed)
+    fake.seed_instance(shard_seed)
+    records = [generate_client_support() for _ in range(rows)]
+    if fmt == "jsonl":
+        return "".join(json.dumps(r) + "\n" for r in records)
+    return records_to_batch(records, ORDERS_SCHEMA)
+
+
+def render_client_support_batch_shard(shard, rows, seed, fmt="jsonl"):
+    rng, shard_seed = shard_rngs(seed, shard)
+    fake.seed_instance(shard_seed)
+    cols = generate_client_support_batch(rows, rng)
+    if fmt == "jsonl":
+        return format_client_support_batch(cols)
+    return client_support_batch_to_arrow(cols)
+
+
+def iter_client_support(total_count, fmt="jsonl", batch_rows=BATCH_ROWS, seed=None, start_shard=0):
+    """Yield orders from the batch path as JSONL text chunks, or RecordBatches for fmt="arrow".
+
+    For in-process consumers such as s3_insert; call configure() first.
+    Every chunk is one shard of batch_rows rows (the last may be shorter).
+    """
+    render = partial(render_client_support_batch_shard, fmt=fmt)
+    yield from run_shards(render, total_count, batch_rows, 1, resolve_seed(seed), start_shard=start_shard)
+
+
+# ---------------------------------------------------------------------------
+# Update stream: status changes for orders emitted by an earlier run, so the
+# WHEN MATCHED branches of the SILVER/GOLD MERGE tasks see realistic upserts.
+# ---------------------------------------------------------------------------
+
+# delivery_status -> next status; payment_status follows (Pending -> Paid -> Refunded)
+ORDER_TRANSITIONS = {
+    "In Transit": "Delivered",
+    "Delivered": "Returned",
+}
+WAREHOUSE_COUNTRY_BY_NAME = {wh["name"]: wh["country"] for wh in warehouses.values()}
+
+
+class OrderUpdates:
+    """Open orders from a prior run's JSONL output, advanced one status at a time.
+
+    The prior file is memory-mapped and only the byte offsets of its open
+    orders are kept; a line is parsed when it is picked. An order that is
+    still open after its update goes back into the pool (as the updated
+    line), so a long run can walk it through In Transit -> Delivered -> Returned.
+    """
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.rng = random.Random(seed)
+        self.offsets = array("q")       # line offsets of the prior file's open orders
+        self.reopened = []              # updated lines whose order is still open
+        self.exhausted = False
+        self._mm = None
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm is not None:
+            statuses = b"|".join(re.escape(s.encode()) for s in ORDER_TRANSITIONS)
+            pattern = re.compile(rb'^[^\n]*"delivery_status": "(?:' + statuses + rb')"', re.MULTILINE)
+            self.offsets.extend(m.start() for m in pattern.finditer(self._mm))
+        sys.stderr.write(f"Loaded {len(self.offsets)} open orders from {path}\n")
+
+    def __len__(self):
+        return len(self.offsets) + len(self.reopened)
+
+    def _take(self):
+        # swap-remove a random open order
+        i = self.rng.randrange(len(self))
+        if i < len(self.offsets):
+            pool = self.offsets
+        else:
+            pool, i = self.reopened, i - len(self.offsets)
+        pool[i], pool[-1] = pool[-1], pool[i]
+        if pool is self.reopened:
+            return pool.pop()
+        offset = pool.pop()
+        end = self._mm.find(b"\n", offset)
+        return self._mm[offset:end if end >= 0 else len(self._mm)]
+
+    def next_update(self):
+        record = json.loads(self._take())
+
+        status = ORDER_TRANSITIONS[record["delivery_status"]]
+        if status == "Delivered":
+            purchase = date.fromisoformat(record["purchase_time"])
+            delivered = date.fromisoformat(record["shipped_date"]) + timedelta(days=self.rng.randint(1, 20))
+            record["delivered_date"] = delivered.isoformat()
+            record["delivery_delay_days"] = (delivered - purchase).days
+            record["payment_status"] = "Paid"
+        else:
+            record["payment_status"] = "Refunded"
+        record["delivery_status"] = status
+        record["carbon_score"] = compute_carbon_score(
+            record["country"], WAREHOUSE_COUNTRY_BY_NAME[record["warehouse"]], record["shipping_method"],
+            record["bag_size"], record["quantity"], status,
+        )
+
+        line = json.dumps(record) + "\n"
+        if status in ORDER_TRANSITIONS:
+            self.reopened.append(line)
+        return line
+
+    def mix_into(self, text, ratio):
+        """Interleave updates into a chunk of new-order lines; updates make up `ratio` of the result."""
+        lines = text.splitlines(keepends=True)
+        wanted = round(len(lines) * ratio / (1 - ratio))
+        updates = []
+        while len(updates) < wanted and len(self):
+            updates.append(self.next_update())
+        emitted = len(updates)
+        # random slots of the result for the updates, filled in the order they were made (an order
+        # updated twice keeps its transitions in order), new orders in between: one pass
+        slots = sorted(self.rng.sample(range(len(lines) + emitted), emitted))
+        mixed, taken = [], 0
+        for u, slot in enumerate(slots):
+            mixed.extend(lines[taken:slot - u])
+            mixed.append(updates[u])
+            taken = slot - u
+        mixed.extend(lines[taken:])
+        lines = mixed
+        if emitted < wanted and not self.exhausted:
+            sys.stderr.write(f"Only {emitted} of {wanted} updates: no open orders left in {self.path}; "
+                             "emitting new orders only\n")
+            self.exhausted = True
+        return "".join(lines)
+
+
 if __name__ == "__main__":
-    args = sys.argv[1:]
-    total_count = int(args[0])
-    for _ in range(total_count):
-        print_client_support()
-    print('')
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate client support orders as JSON lines on stdout")
+    parser.add_argument("total_count", type=int, nargs="?", default=None)
+    parser.add_argument("--batch", type=int, nargs="?", const=BATCH_ROWS, default=None, metavar="ROWS",
+                        help=f"vectorized generation, ROWS orders per batch (default {BATCH_ROWS})")
+    parser.add_argument("--customer-pool", default=CUSTOMER_POOL_PATH,
+                        help="customer pool file, built on first use and memory-mapped after")
+    parser.add_argument("--pool-size", type=int, default=CUSTOMER_POOL_SIZE)
+    parser.add_argument("--repeat-skew", type=float, default=CUSTOMER_SKEW,
+                        help="Zipf exponent for repeat purchases (0 = uniform)")
+    parser.add_argument("--item-skew", type=float, default=ITEM_SKEW,
+                        help="Zipf exponent over the catalogue, first items hottest (0 = uniform)")
+    parser.add_argument("--seasonality", type=float, default=SEASONALITY,
+                        help="height of the holiday/spring purchase peaks above the base level (0 = flat)")
+    parser.add_argument("--region-weights", type=parse_region_weights, default=None,
+                        help='relative region weights, e.g. "North America=3,Europe=2" (others 1)')
+    parser.add_argument("--workers", type=int, default=1, help="generator processes")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for reproducible output (identical for any --workers)")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                        help="reference time instead of now, e.g. 2025-10-01T00:00:00")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl",
+                        help="jsonl text, Arrow IPC stream, or Parquet file (RAW table columns and types)")
+    parser.add_argument("--output", default=None, help="output file (default stdout; required for parquet)")
+    parser.add_argument("--updates-from", default=None, metavar="JSONL",
+                        help="prior run output to replay status changes for (jsonl format only)")
+    parser.add_argument("--update-ratio", type=float, default=0.3,
+                        help="share of the output that is updates; total_count and --rate count new "
+                             "orders and updates are mixed in on top")
+    parser.add_argument("--rate", type=float, default=None, metavar="EVENTS_PER_SEC",
+                        help="stream continuously at this rate (total_count becomes an optional cap)")
+    parser.add_argument("--profile", choices=PROFILES, default="constant", help="burst profile for --rate")
+    parser.add_argument("--period", type=float, default=60.0, help="burst profile period in seconds")
+    parser.add_argument("--burst", type=float, default=3.0, help="peak rate as a multiple of --rate")
+    parser.add_argument("--duration", type=float, default=0, help="stop streaming after this many seconds")
+    args = parser.parse_args()
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet needs --output")
+    if args.total_count is None and args.rate is None:
+        parser.error("total_count is required unless streaming with --rate")
+    if args.updates_from and (args.format != "jsonl" or not 0 <= args.update_ratio < 1):
+        parser.error("--updates-from needs --format jsonl and 0 <= --update-ratio < 1")
+
+    seed = resolve_seed(args.seed)
+    # the pool is keyed by --seed as given: unseeded runs reuse whatever pool there is
+    settings = (args.customer_pool, args.pool_size, args.repeat_skew, args.as_of, args.seed,
+                args.item_skew, args.seasonality, args.region_weights)
+    configure(*settings)
+
+    if args.batch:
+        render, shard_rows = render_client_support_batch_shard, args.batch
+    else:
+        render, shard_rows = render_client_support_shard, SHARD_ROWS
+    out = GeneratorOutput(args.format, ORDERS_SCHEMA, args.output)
+    updates = OrderUpdates(args.updates_from, seed) if args.updates_from else None
+
+    def write(part):
+        if updates is not None:
+            part = updates.mix_into(part, args.update_ratio)
+        out.write(part)
+        if args.rate:
+            out.flush()
+
+    if args.rate:
+        run_paced(
+            partial(render, seed=seed, fmt=args.format),
+            lambda t: profile_rate(args.profile, args.rate, t, args.period, args.burst),
+            write, max_events=args.total_count or 0, duration=args.duration,
+        )
+    else:
+        for part in run_shards(partial(render, fmt=args.format), args.total_count, shard_rows, args.workers, seed,
+                               initializer=configure, initargs=settings):
+            write(part)
+    if args.format == "jsonl":
+        # empty line: end-of-input marker for the stdin loaders
+        out.write("\n")
+    out.close()
@@ -0,0 +1,49 @@
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ---------------------------------------------------------------------------
+# Output sinks for the data generators.
+#   jsonl   - JSON lines text (the loaders' stdin format), parts are str
+#   arrow   - Arrow IPC stream, parts are RecordBatches
+#   parquet - Parquet file, one row group per part
+# ---------------------------------------------------------------------------
+
+FORMATS = ["jsonl", "arrow", "parquet"]
+
+
+class GeneratorOutput:
+    def __init__(self, fmt, schema, path=None):
+        if fmt == "parquet" and not path:
+            raise ValueError("parquet output needs a file path")
+        self.fmt = fmt
+        self._file = None
+        self._writer = None
+        if fmt == "jsonl":
+            self._file = open(path, "w") if path else sys.stdout
+        elif fmt == "arrow":
+            self._file = open(path, "wb") if path else sys.stdout.buffer
+            self._writer = pa.ipc.new_stream(self._file, schema)
+        else:
+            self._writer = pq.ParquetWriter(path, schema, compression="SNAPPY")
+
+    def write(self, part):
+        if self.fmt == "jsonl":
+            self._file.write(part)
+        elif self.fmt == "arrow":
+            self._writer.write_batch(part)
+        else:
+            self._writer.write_table(pa.Table.from_batches([part]))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None and self._file not in (sys.stdout, sys.stdout.buffer):
+            self._file.close()
+        elif self._file is not None:
+            self._file.flush()
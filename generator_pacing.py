@@ -0,0 +1,109 @@
+import math
+import sys
+import time
+
+# ---------------------------------------------------------------------------
+# Rate-controlled streaming for the data generators.
+#
+# Output is produced on a fixed tick clock: every tick adds rate * tick
+# seconds of event credit, the whole part of it is generated as one chunk and
+# the generator then sleeps until the next tick deadline. Deadlines are
+# absolute, so a slow tick is caught up instead of shifting the schedule, and
+# there is no busy-waiting. Rates are reported against wall time, so a
+# generator that cannot keep up shows as behind its target.
+# ---------------------------------------------------------------------------
+
+PROFILES = ["constant", "step", "sine", "spike"]
+TICK_SECONDS = 0.05
+REPORT_SECONDS = 5.0
+SPIKE_FRACTION = 0.1   # share of each period spent at the burst rate (spike)
+
+
+def profile_rate(profile, rate, t, period=60.0, burst=3.0):
+    """Target events/sec at t seconds into the run.
+
+    step  - base rate for the first half of each period, rate * burst after
+    sine  - smooth swing between rate and rate * burst once per period
+    spike - rate * burst for the first SPIKE_FRACTION of each period
+    """
+    phase = (t % period) / period
+    if profile == "step":
+        return rate * burst if phase >= 0.5 else rate
+    if profile == "sine":
+        return rate * (1 + (burst - 1) * (1 - math.cos(2 * math.pi * phase)) / 2)
+    if profile == "spike":
+        return rate * burst if phase < SPIKE_FRACTION else rate
+    return rate
+
+
+def rate_integral(rate_at, t0, t1):
+    """Events rate_at(t) asks for between t0 and t1 seconds (midpoint rule, TICK_SECONDS steps)."""
+    steps = max(1, math.ceil((t1 - t0) / TICK_SECONDS))
+    step = (t1 - t0) / steps
+    return sum(rate_at(t0 + (i + 0.5) * step) for i in range(steps)) * step
+
+
+def run_paced(render_tick, rate_at, write, max_events=0, duration=0, report=sys.stderr):
+    """Write render_tick(tick, rows) chunks so output follows rate_at(t) events/sec.
+
+    Runs until max_events rows or duration seconds of wall time (0 =
+    unbounded) or Ctrl-C. Every REPORT_SECONDS the achieved rate is reported
+    against the target, which is rate_at integrated over the wall time that
+    has passed, with the shortfall if the generator cannot keep up. Returns
+    the number of events written.
+    """
+    start = time.monotonic()
+    tick = 0
+    credit = 0.0
+    emitted = 0
+    target_total = 0.0      # events due by wall time
+    target_until = 0.0      # seconds of wall time target_total covers
+    last_report, last_emitted, last_target = start, 0, 0.0
+
+    def advance_target(now):
+        nonlocal target_total, target_until
+        target_total += rate_integral(rate_at, target_until, now - start)
+        target_until = now - start
+
+    def log_rate(now, label="rate"):
+        advance_target(now)
+        elapsed = max(now - last_report, 1e-9)
+        behind = target_total - emitted
+        shortfall = f" behind by {behind:,.0f}" if behind >= 1 + rate_at(target_until) * TICK_SECONDS else ""
+        report.write(
+            f"[{label}] target {(target_total - last_target) / elapsed:,.0f}/s "
+            f"achieved {(emitted - last_emitted) / elapsed:,.0f}/s total {emitted:,}{shortfall}\n"
+        )
+        report.flush()
+
+    try:
+        while True:
+            now = time.monotonic()
+            if duration and now - start >= duration:
+                break
+            credit += rate_at(tick * TICK_SECONDS) * TICK_SECONDS
+            rows = int(credit)
+            if max_events:
+                rows = min(rows, max_events - emitted)
+            if rows > 0:
+                write(render_tick(tick, rows))
+                credit -= rows
+                emitted += rows
+            tick += 1
+            if max_events and emitted >= max_events:
+                break
+
+            now = time.monotonic()
+            if now - last_report >= REPORT_SECONDS:
+                log_rate(now)
+                last_report, last_emitted, last_target = now, emitted, target_total
+            delay = start + tick * TICK_SECONDS - now
+            if delay > 0:
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        pass
+
+    # whole-run summary
+    last_report, last_emitted, last_target = start, 0, 0.0
+    log_rate(time.monotonic(), "rate total")
+    return emitted
@@ -0,0 +1,99 @@
+import secrets
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Deterministic sharding shared by the data generators.
+#
+# The row count is cut into fixed-size shards and every shard derives its own
+# seeds from (seed, shard index). Shard boundaries never depend on the worker
+# count, so the concatenated output is byte-identical for any --workers value.
+# ---------------------------------------------------------------------------
+
+SHARD_ROWS = 100_000
+
+
+def shard_plan(total_count, shard_rows=SHARD_ROWS):
+    """List of (shard index, row count) covering total_count rows."""
+    return [
+        (i, min(shard_rows, total_count - start))
+        for i, start in enumerate(range(0, total_count, shard_rows))
+    ]
+
+
+def shard_rngs(seed, shard):
+    """NumPy Generator plus an int seed (for random / Faker) derived for one shard."""
+    seq = np.random.SeedSequence([seed, shard])
+    return np.random.default_rng(seq), int(seq.generate_state(1)[0])
+
+
+def resolve_seed(seed):
+    return seed if seed is not None else secrets.randbits(32)
+
+
+def run_shards(render_shard, total_count, shard_rows, workers, seed, initializer=None, initargs=(), start_shard=0):
+    """Yield render_shard(shard, rows, seed) results in shard order.
+
+    render_shard must be a module-level function so it can be sent to the
+    process pool; initializer/initargs re-apply the generator configuration
+    in every worker. Shards before start_shard are skipped without being
+    generated, which is how an interrupted run resumes.
+    """
+    tasks = [(shard, rows, seed) for shard, rows in shard_plan(total_count, shard_rows) if shard >= start_shard]
+    if workers <= 1:
+        for task in tasks:
+            yield render_shard(*task)
+        return
+    with Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        # keep a bounded window of shards in flight so a slow consumer of the
+        # output never lets finished shards pile up in memory
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(render_shard, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# (text columns, hex digit columns) of the five dash-separated UUID groups
+_UUID_GROUPS = [((0, 8), (0, 8)), ((9, 13), (8, 12)), ((14, 18), (12, 16)), ((19, 23), (16, 20)), ((24, 36), (20, 32))]
+
+
+def uuid4_ascii(rng, n):
+    """n random (version 4) UUIDs as an (n, 36) array of ASCII bytes."""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+    digits = _HEX_DIGITS[nibbles]
+    text = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for (t0, t1), (d0, d1) in _UUID_GROUPS:
+        text[:, t0:t1] = digits[:, d0:d1]
+    return text
+
+
+def uuid4_strings(rng, n):
+    """n random (version 4) UUID strings drawn from a NumPy Generator."""
+    text = uuid4_ascii(rng, n).tobytes().decode("ascii")
+    return [text[o:o + 36] for o in range(0, 36 * n, 36)]
+
+
+def round2(values):
+    """Vectorized round(x, 2) that agrees with Python's round() bit for bit.
+
+    np.round scales by 100 and rounds half to even on the scaled double, which
+    can disagree with Python's correctly rounded result right at a half; those
+    few values are redone with round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.round(values, 2)
+    frac = np.abs(values * 100 - np.floor(values * 100) - 0.5)
+    for i in np.flatnonzero(frac < 1e-6):
+        out[i] = round(float(values[i]), 2)
+    return out
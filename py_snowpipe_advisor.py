@@ -0,0 +1,97 @@
+import sys
+import argparse
+import io
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from py_snowpipe_core import LEGACY_PROFILE, PARQUET_PROFILES, BlockParser, ParquetProfile, read_blocks
+from py_snowpipe_carbon import CARBON_KEYS
+from py_snowpipe_orders import ORDERS_KEYS
+from raw_schemas import CARBON_SCHEMA, CARBON_TABLE, ORDERS_SCHEMA, ORDERS_TABLE
+
+# ---------------------------------------------------------------------------
+# Parquet encoding advisor: samples a batch of generator output from stdin,
+# encodes it with candidate profiles and reports file size and encode time,
+# to choose PARQUET_PROFILES in py_snowpipe_core.py.
+#
+#   python data_generator_orders.py 200000 --batch | python py_snowpipe_advisor.py orders
+# ---------------------------------------------------------------------------
+
+TABLES = {
+    "orders": (ORDERS_TABLE, ORDERS_SCHEMA, ORDERS_KEYS),
+    "carbon": (CARBON_TABLE, CARBON_SCHEMA, CARBON_KEYS),
+}
+SAMPLE_ROWS = 100_000
+DICTIONARY_CARDINALITY = 0.5    # distinct/rows below which a column is worth a dictionary
+SORT_CARDINALITY = 0.001        # columns this repetitive are sort key candidates
+
+
+def read_sample(stream, parser, rows):
+    tables, total = [], 0
+    for block in read_blocks(stream):
+        table, _ = parser.parse(block)
+        tables.append(table)
+        total += table.num_rows
+        if total >= rows:
+            break
+    return pa.concat_tables(tables).slice(0, rows) if tables else None
+
+
+def cardinality(table):
+    """distinct / rows per column."""
+    return {name: pc.count_distinct(table[name]).as_py() / max(table.num_rows, 1) for name in table.column_names}
+
+
+def candidate_profiles(table_name, ratios):
+    repeating = [name for name, ratio in ratios.items() if ratio < DICTIONARY_CARDINALITY]
+    sort_keys = sorted((ratio, name) for name, ratio in ratios.items() if ratio < SORT_CARDINALITY)
+    current = PARQUET_PROFILES[table_name]
+    candidates = {
+        "legacy": LEGACY_PROFILE,
+        "dictionary all, snappy": ParquetProfile(True, "SNAPPY"),
+        "dictionary repeating, snappy": ParquetProfile(repeating, "SNAPPY"),
+        "dictionary repeating, zstd(1)": ParquetProfile(repeating, "ZSTD", 1),
+        "dictionary repeating, zstd(3)": ParquetProfile(repeating, "ZSTD", 3),
+        "dictionary repeating, zstd(9)": ParquetProfile(repeating, "ZSTD", 9),
+        "dictionary repeating, zstd(3), 64k row groups": ParquetProfile(repeating, "ZSTD", 3, 64 * 1024),
+        "current": current,
+    }
+    if len(sort_keys) >= 2:
+        keys = [name for _, name in sort_keys[:2]]
+        candidates[f"current, sorted by {','.join(keys)}"] = ParquetProfile(
+            current.dictionary, current.compression, current.level, current.row_group_rows, keys
+        )
+    return candidates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Parquet encoding profiles on a sample of loader input")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("--rows", type=int, default=SAMPLE_ROWS, help="sample size taken from stdin")
+    args = parser.parse_args()
+
+    table_name, schema, keys = TABLES[args.table]
+    sample = read_sample(sys.stdin.buffer, BlockParser(schema, keys), args.rows)
+    if sample is None:
+        sys.exit("No input rows")
+    ratios = cardinality(sample)
+    print(f"{table_name}: {sample.num_rows} rows, {sample.nbytes / 1e6:.1f} MB in Arrow")
+    print("distinct/rows: " + ", ".join(f"{name} {ratio:.4f}" for name, ratio in ratios.items()))
+
+    results = []
+    for label, profile in candidate_profiles(table_name, ratios).items():
+        buf = io.BytesIO()
+        start = time.process_time()
+        profile.write(sample, buf)
+        results.append((label, profile, buf.getbuffer().nbytes, time.process_time() - start))
+
+    baseline = results[0][2]
+    width = max(len(r[0]) for r in results)
+    print(f"\n{'profile':{width}} {'MB':>8} {'vs legacy':>10} {'/ Arrow':>8} {'encode s':>9}")
+    for label, profile, size, seconds in results:
+        print(f"{label:{width}} {size / 1e6:8.2f} {size / baseline:9.0%} {size / sample.nbytes:8.3f} {seconds:9.2f}")
+        print(f"    {profile.describe()}")
+    label, _, size, _ = min(results, key=lambda r: r[2])
+    print(f"\nSmallest: {label} ({size / 1e6:.2f} MB)")
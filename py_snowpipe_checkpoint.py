@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Crash-safe checkpoint of the stdin loaders (--checkpoint PATH).
+#
+# Input records are numbered by line, from 0. Every batch carries the range
+# of input records it was cut from; once Snowpipe's load report confirms the
+# batch's staged file as loaded, the file name and range are appended to the
+# checkpoint (fsynced). A restart on the same input skips every record in a
+# confirmed range - whole blocks without parsing them - so only batches that
+# were still in flight are loaded again. The input is recognised by a hash of
+# its first line.
+# ---------------------------------------------------------------------------
+
+CONFIRM_WAIT = 300.0    # seconds close() waits for the load reports of the last files
+
+
+def input_fingerprint(block):
+    first_line = block.split(b"\n", 1)[0]
+    return hashlib.sha256(first_line).hexdigest()
+
+
+class LoadCheckpoint:
+    """Append-only JSONL log of the input ranges that are loaded into RAW.
+
+    Lines are {"type": "input", ...} with the fingerprint of the input and
+    {"type": "loaded", ...} per confirmed file (file, first, end: records
+    [first, end) of the input). resume() is called with the first block of
+    the input and sets up skipped()/unloaded().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+        self._starts = self._ends = np.zeros(0, dtype=np.int64)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+    def append(self, entry):
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries.append(entry)
+
+    def resume(self, first_block):
+        fingerprint = input_fingerprint(first_block)
+        inputs = [e for e in self.entries if e["type"] == "input"]
+        if not inputs:
+            self.append({"type": "input", "fingerprint": fingerprint,
+                         "started": datetime.now(timezone.utc).isoformat()})
+            return
+        if inputs[0]["fingerprint"] != fingerprint:
+            raise ValueError(f"{self.path} is the checkpoint of another input; remove it to start over")
+
+        merged = []
+        for first, end in sorted((e["first"], e["end"]) for e in self.entries if e["type"] == "loaded"):
+            if merged and first <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([first, end])
+        if merged:
+            self._starts, self._ends = (np.array(column, dtype=np.int64) for column in zip(*merged))
+        prefix = merged[0][1] if merged and merged[0][0] == 0 else 0
+        logging.info(f"Resuming from {self.path}: {int((self._ends - self._starts).sum())} records already "
+                     f"loaded (all of the first {prefix}), in {len(merged)} ranges")
+
+    def skipped(self, first, count):
+        """Whether records [first, first + count) are all loaded already."""
+        i = np.searchsorted(self._starts, first, side="right") - 1
+        return i >= 0 and first + count <= self._ends[i]
+
+    def unloaded(self, records):
+        """Mask of the record numbers (sorted) that are not loaded yet, or None if none is."""
+        i = np.searchsorted(self._starts, records, side="right") - 1
+        loaded = (i >= 0) & (records < self._ends[np.maximum(i, 0)]) if len(self._starts) else None
+        return ~loaded if loaded is not None and loaded.any() else None
+
+    def loaded(self, file_name, records):
+        first, end = records
+        self.append({"type": "loaded", "file": file_name, "first": int(first), "end": int(end)})
@@ -0,0 +1,145 @@
+import math
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Optional client-side dedup of the loaders (--dedup): drops exact replays,
+# records whose key (TXID for orders, RECORD_ID for carbon) and input line
+# the loader has both already staged, before they cost PUT bytes and
+# Snowpipe work. A record that reuses a key with a different payload (an
+# order status update, see data_generator_orders.py --updates-from) is
+# kept: SILVER keeps the latest version of a key, not the first. SILVER
+# still deduplicates; this only trims what reaches it.
+#
+# Keys go into a windowed Bloom filter of fixed size: DEDUP_GENERATIONS
+# Bloom filters sharing the memory budget, each with 1/generations of the
+# false-positive budget, so a key is wrongly taken for a duplicate with
+# probability at most fp_rate. When the newest generation is full the
+# oldest is cleared and reused: memory stays fixed and the last
+# (generations - 1) * capacity keys are always remembered. The filters are
+# blocked: all bits of a key are in one 64-bit word, so a lookup or insert
+# is one memory access per generation (NumPy, a block of keys at a time),
+# for somewhat more bits per key than a classic Bloom filter.
+# ---------------------------------------------------------------------------
+
+DEDUP_FP_RATE = 0.001
+DEDUP_MB = 64
+DEDUP_GENERATIONS = 4
+MAX_PROBES = 20         # bits per key; drawn 6 at a time from 64-bit hashes
+
+
+def _mix64(h):
+    # splitmix64 finaliser: derives independent hashes from a key's hash
+    with np.errstate(over="ignore"):
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def blocked_fp_rate(keys_per_word, probes):
+    """False-positive rate of a blocked Bloom filter: Poisson keys per word, probes bits each.
+
+    Probe bits are drawn independently, so they can coincide: a key sets
+    (and a lookup tests) probes or fewer distinct bits of its word.
+    """
+    loads = np.arange(int(keys_per_word + 10 * math.sqrt(keys_per_word) + 20))
+    log_factorials = np.concatenate(([0.0], np.cumsum(np.log(loads[1:]))))
+    pmf = np.exp(loads * math.log(keys_per_word) - keys_per_word - log_factorials)
+    # distinct bits among a lookup's probes
+    distinct = np.zeros(probes + 1)
+    distinct[0] = 1.0
+    for _ in range(probes):
+        distinct[1:] = distinct[1:] * np.arange(1, probes + 1) / 64 + distinct[:-1] * (64 - np.arange(probes)) / 64
+        distinct[0] = 0.0
+    # P(j given bits all set | load), inclusion-exclusion over the bits left unset
+    signs = np.array([[(-1) ** i * math.comb(j, i) for i in range(probes + 1)] for j in range(probes + 1)])
+    free = ((64 - np.arange(probes + 1)[:, None]) / 64) ** (probes * loads)
+    return float(distinct @ signs @ free @ pmf)
+
+
+def blocked_layout(fp_rate):
+    """Most keys per 64-bit word (and the probes for it) that stay within fp_rate."""
+    low, high = 1e-3, 64.0
+    for _ in range(50):
+        mid = (low + high) / 2
+        if min(blocked_fp_rate(mid, k) for k in range(1, MAX_PROBES + 1)) <= fp_rate:
+            low = mid
+        else:
+            high = mid
+    probes = min(range(1, MAX_PROBES + 1), key=lambda k: blocked_fp_rate(low, k))
+    return low, probes
+
+
+class WindowedBloomFilter:
+    """Membership of recent 64-bit key hashes in memory_bytes, within fp_rate."""
+
+    def __init__(self, fp_rate=DEDUP_FP_RATE, memory_bytes=DEDUP_MB * 1024 * 1024, generations=DEDUP_GENERATIONS):
+        self.fp_rate = fp_rate
+        self.words = max(1, memory_bytes // generations // 8)
+        keys_per_word, self.probes = blocked_layout(fp_rate / generations)
+        self.capacity = max(1, int(self.words * keys_per_word))
+        self.generations = [np.zeros(self.words, dtype=np.uint64) for _ in range(generations)]
+        self.current = 0
+        self.count = 0          # keys in the current generation
+        self.rotations = 0
+
+    def _locate(self, hashes):
+        # the key's word, and the pattern of its probe bits in that word
+        pattern = np.zeros(len(hashes), dtype=np.uint64)
+        bits = hashes
+        for probe in range(self.probes):
+            if probe % 10 == 0:
+                bits = _mix64(bits)
+            pattern |= np.left_shift(np.uint64(1), (bits >> np.uint64(6 * (probe % 10))) & np.uint64(63))
+        return _mix64(hashes ^ np.uint64(0x9E3779B97F4A7C15)) % np.uint64(self.words), pattern
+
+    def contains(self, hashes):
+        word, pattern = self._locate(hashes)
+        found = np.zeros(len(hashes), dtype=bool)
+        for words in self.generations:
+            found |= (words[word] & pattern) == pattern
+        return found
+
+    def add(self, hashes):
+        while len(hashes):
+            if self.count >= self.capacity:
+                self.current = (self.current + 1) % len(self.generations)
+                self.generations[self.current][:] = 0
+                self.count = 0
+                self.rotations += 1
+            take = hashes[:self.capacity - self.count]
+            word, pattern = self._locate(take)
+            np.bitwise_or.at(self.generations[self.current], word, pattern)
+            self.count += len(take)
+            hashes = hashes[len(take):]
+
+    def window(self):
+        """Least number of most recent keys the filter remembers."""
+        return (len(self.generations) - 1) * self.capacity + self.count
+
+
+class KeyDedup:
+    """Drops the rows of parsed batches whose key column value and input line were seen before."""
+
+    def __init__(self, key, fp_rate=DEDUP_FP_RATE, memory_mb=DEDUP_MB):
+        self.key = key
+        self.filter = WindowedBloomFilter(fp_rate, int(memory_mb * 1024 * 1024))
+        self.checked = 0
+        self.dropped = 0
+
+    def unseen(self, table, lines):
+        """Mask of the rows whose key and line (one per row) are new, also within the table (first one kept)."""
+        keys = table.column(self.key).to_pylist()
+        hashes = np.fromiter((hash(row) for row in zip(keys, lines.to_pylist())), dtype=np.int64,
+                             count=len(keys)).view(np.uint64)
+        first = np.zeros(len(keys), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+        first[first] = ~self.filter.contains(hashes[first])
+        self.filter.add(hashes[first])
+        self.checked += len(keys)
+        self.dropped += len(keys) - int(first.sum())
+        return first
+
+    def summary(self):
+        return (f"{self.dropped} of {self.checked} records dropped as replays (same {self.key} and payload) "
+                f"(last {self.filter.window():,} keys remembered, false positives <= {self.filter.fp_rate:g})")
@@ -0,0 +1,130 @@
+import glob
+import gzip
+import heapq
+import logging
+import mmap
+import multiprocessing
+import os
+
+from py_snowpipe_core import READ_BLOCK, read_blocks, run_loader
+
+# ---------------------------------------------------------------------------
+# File input mode of the loaders (--files): backfills from JSONL files on disk
+# instead of stdin.
+#
+# Plain files are memory-mapped and split into chunks of about --chunk-mb,
+# cut at line boundaries; the OS pages them in as the workers parse them.
+# Gzip files cannot be split and are one chunk each, decompressed straight
+# from the map. The chunks are spread over a pool of worker processes by
+# size; every worker loads its chunks as one input on a Snowflake
+# connection, ingest manager and SavePipeline of its own (run_loader), so
+# batches are cut across chunk boundaries as usual. An empty line still ends
+# the input of a file, as on stdin.
+# ---------------------------------------------------------------------------
+
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_RATIO = 6      # guessed uncompressed/compressed size of a .gz file, to balance the workers
+
+
+class FileChunk:
+    """Bytes [start, end) of a plain JSONL file, cut at line boundaries, or a whole gzip file (end None)."""
+
+    def __init__(self, path, start=0, end=None):
+        self.path = path
+        self.start = start
+        self.end = end
+
+    def weight(self):
+        if self.end is None:
+            return os.path.getsize(self.path) * GZIP_RATIO
+        return self.end - self.start
+
+    def blocks(self, block_size=READ_BLOCK):
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if self.end is None:
+                yield from read_blocks(gzip.GzipFile(fileobj=mm), block_size)
+            else:
+                yield from mapped_blocks(mm, self.start, self.end, block_size)
+
+
+def mapped_blocks(mm, start, end, block_size=READ_BLOCK):
+    """Yield blocks of whole lines from mm[start:end], which starts and ends at a line boundary."""
+    while start < end:
+        stop = min(start + block_size, end)
+        if stop < end:
+            cut = mm.rfind(b"\n", start, stop)
+            # a single line longer than block_size is taken whole
+            stop = cut + 1 if cut >= 0 else (mm.find(b"\n", stop, end) + 1 or end)
+        yield mm[start:stop]
+        start = stop
+
+
+def input_end(mm):
+    # offset of the end-of-input marker (an empty line), like read_blocks
+    if mm[:1] == b"\n":
+        return 0
+    marker = mm.find(b"\n\n")
+    return marker + 1 if marker >= 0 else len(mm)
+
+
+def plan_chunks(patterns, chunk_bytes):
+    """FileChunks of every file matching the glob patterns, in file order."""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern, recursive=True)})
+    if not paths:
+        raise FileNotFoundError(f"No input files match {' '.join(patterns)}")
+    chunks = []
+    for path in paths:
+        if os.path.getsize(path) == 0:
+            continue
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:2] == GZIP_MAGIC:
+                chunks.append(FileChunk(path))
+                continue
+            end = input_end(mm)
+            start = 0
+            while start < end:
+                stop = min(start + chunk_bytes, end)
+                if stop < end:
+                    stop = mm.find(b"\n", stop - 1, end) + 1 or end
+                chunks.append(FileChunk(path, start, stop))
+                start = stop
+    logging.info(f"Planned {len(chunks)} chunks of {len(paths)} files")
+    return chunks
+
+
+def assign_chunks(chunks, workers):
+    """Split chunks into at most workers lists of about equal weight, largest chunk first."""
+    loads = [(0, i) for i in range(workers)]
+    parts = [[] for _ in range(workers)]
+    for chunk in sorted(chunks, key=FileChunk.weight, reverse=True):
+        load, i = heapq.heappop(loads)
+        parts[i].append(chunk)
+        heapq.heappush(loads, (load + chunk.weight(), i))
+    # each worker reads its chunks in file order
+    return [sorted(part, key=lambda c: (c.path, c.start)) for part in parts if part]
+
+
+def _load_chunks(chunks, policy, loader):
+    # runs in a worker process
+    def source():
+        for chunk in chunks:
+            yield from chunk.blocks()
+
+    logging.info(f"Worker {os.getpid()} loading {len(chunks)} chunks")
+    return run_loader(source(), policy, **loader)
+
+
+def load_files(patterns, policy, workers, chunk_mb, **loader):
+    """Load the JSONL files matching patterns on a pool of worker processes.
+
+    loader are run_loader's table arguments (schema, keys, stage, pipe,
+    query_tag, profile); every worker gets its own copy of policy. Returns
+    the number of records processed.
+    """
+    chunks = plan_chunks(patterns, int(chunk_mb * 1024 * 1024))
+    parts = assign_chunks(chunks, max(workers, 1))
+    if not parts:
+        return 0
+    with multiprocessing.Pool(len(parts)) as pool:
+        processed = pool.starmap(_load_chunks, [(part, policy, loader) for part in parts])
+    return sum(processed)
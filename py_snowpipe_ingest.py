@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from snowflake.ingest import StagedFile
+
+# ---------------------------------------------------------------------------
+# Snowpipe REST side of the loaders.
+#
+# IngestNotifier collects staged file names and submits them in multi-file
+# insertFiles calls (ingest_files), flushed once NOTIFY_MAX_FILES are waiting
+# or the oldest has waited NOTIFY_MAX_AGE seconds. LoadReportPoller polls
+# insertReport (get_history) in the background and reports, per submitted
+# file, when it was loaded and how long that took, or why it failed.
+# Both only use ingest_files / get_history, so a fake manager can stand in.
+# ---------------------------------------------------------------------------
+
+NOTIFY_MAX_FILES = 100      # insertFiles accepts up to 5000 files per request
+NOTIFY_MAX_AGE = 1.0        # seconds a staged file may wait for its notification
+POLL_SECONDS = 10.0
+REPORT_WINDOW = 600         # insertReport only keeps the last 10 minutes of events
+FAILED_STATUSES = ("LOAD_FAILED", "PARTIALLY_LOADED")
+
+_DONE = object()
+
+
+def parse_report_time(value):
+    # insertReport times look like "2017-06-21T04:47:41.453Z"
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+class LoadReportPoller:
+    """Tracks submitted files until insertReport says they are loaded or failed.
+
+    poll() does one get_history round and can be called directly, e.g. with
+    a fake ingest manager and clock; start() runs it every interval seconds
+    on a daemon thread. on_loaded, if
+    given, is called with the latency of every loaded file, on_confirmed
+    with its name.
+    """
+
+    def __init__(self, ingest_manager, interval=POLL_SECONDS, clock=time.time, on_loaded=None,
+                 on_confirmed=None):
+        self.ingest_manager = ingest_manager
+        self.interval = interval
+        self.clock = clock
+        self.on_loaded = on_loaded
+        self.on_confirmed = on_confirmed
+        self.pending = {}           # file name -> submit time
+        self.loaded = 0
+        self.failed = 0
+        self.expired = 0
+        self.latencies = []         # seconds from notification to load, per loaded file
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submitted(self, file_names, when=None):
+        when = self.clock() if when is None else when
+        with self._lock:
+            for name in file_names:
+                self.pending[name] = when
+
+    def poll(self):
+        with self._lock:
+            if not self.pending:
+                return
+            oldest = min(self.pending.values())
+        now = self.clock()
+        window = int(min(max(now - oldest, 0) + self.interval, REPORT_WINDOW)) + 1
+        try:
+            history = self.ingest_manager.get_history(recent_seconds=window)
+        except Exception:
+            logging.exception("Snowpipe insertReport request failed")
+            return
+
+        loaded = []
+        with self._lock:
+            for entry in history.get("files", []):
+                name = entry.get("path")
+                if name not in self.pending or not entry.get("complete"):
+                    continue
+                submitted = self.pending.pop(name)
+                if entry.get("status") in FAILED_STATUSES:
+                    self.failed += 1
+                    logging.error(f"Snowpipe load {entry.get('status')} for {name}: "
+                                  f"{entry.get('errorsSeen')} errors, first: {entry.get('firstError')}")
+                    continue
+                finished = parse_report_time(entry.get("lastInsertTime")) or now
+                latency = max(finished - submitted, 0.0)
+                self.loaded += 1
+                self.latencies.append(latency)
+                loaded.append(latency)
+                if self.on_loaded:
+                    self.on_loaded(latency)
+                if self.on_confirmed:
+                    self.on_confirmed(name)
+            # past the report window a file can no longer show up
+            for name, submitted in list(self.pending.items()):
+                if now - submitted > REPORT_WINDOW:
+                    del self.pending[name]
+                    self.expired += 1
+                    logging.warning(f"No Snowpipe load report for {name} after {REPORT_WINDOW}s")
+            pending = len(self.pending)
+
+        if loaded:
+            loaded.sort()
+            logging.info(f"Snowpipe loaded {len(loaded)} files: latency p50 {loaded[len(loaded) // 2]:.1f}s "
+                         f"max {loaded[-1]:.1f}s ({pending} still pending)")
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        p50 = f"{latencies[len(latencies) // 2]:.1f}s" if latencies else "-"
+        return (f"{self.loaded} loaded (latency p50 {p50}), {self.failed} failed, "
+                f"{self.expired} without report, {len(self.pending)} pending")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, wait=0.0):
+        """Stop polling, after up to wait seconds more for the pending files' reports."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.poll()
+        deadline = time.monotonic() + wait
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(min(self.interval, max(deadline - time.monotonic(), 0)))
+            self.poll()
+        logging.info(f"Snowpipe load report: {self.summary()}")
+
+
+class IngestNotifier:
+    """Submits staged files to Snowpipe in coalesced ingest_files calls.
+
+    add() only queues the name; a background thread flushes by count or age.
+    Submitted files are handed to the poller, if any; the names of a failed
+    request are handed to on_failed, if given (otherwise they are dropped).
+    """
+
+    def __init__(self, ingest_manager, poller=None, max_files=NOTIFY_MAX_FILES, max_age=NOTIFY_MAX_AGE,
+                 on_failed=None):
+        self.ingest_manager = ingest_manager
+        self.poller = poller
+        self.max_files = max_files
+        self.max_age = max_age
+        self.on_failed = on_failed
+        self.requests = 0
+        self._inbox = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, file_name):
+        self._inbox.put(file_name)
+
+    def submit(self, names):
+        """One insertFiles request for names, right away; False if it failed."""
+        try:
+            resp = self.ingest_manager.ingest_files([StagedFile(name, None) for name in names])
+            logging.info(f"Ingest requested for {len(names)} files: {resp['responseCode']}")
+        except Exception:
+            logging.exception(f"Snowpipe ingest failed for {len(names)} files")
+            return False
+        self.requests += 1
+        if self.poller is not None:
+            self.poller.submitted(names)
+        return True
+
+    def _flush(self, names):
+        if not self.submit(names) and self.on_failed is not None:
+            self.on_failed(names)
+
+    def _run(self):
+        pending, oldest = [], None
+        while True:
+            timeout = None if not pending else max(oldest + self.max_age - time.monotonic(), 0)
+            try:
+                item = self._inbox.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                if pending:
+                    self._flush(pending)
+                return
+            if item is not None:
+                if not pending:
+                    oldest = time.monotonic()
+                pending.append(item)
+            if len(pending) >= self.max_files or (pending and time.monotonic() - oldest >= self.max_age):
+                self._flush(pending)
+                pending = []
+
+    def close(self):
+        self._inbox.put(_DONE)
+        self._thread.join()
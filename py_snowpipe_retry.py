@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+
+# ---------------------------------------------------------------------------
+# Retries and dead letters of the loaders' SavePipeline.
+#
+# A batch that fails to encode, PUT or be notified is handed to a RetryQueue,
+# which runs it again on a thread of its own after an exponential backoff
+# with full jitter, so the stages keep taking new batches meanwhile. After
+# RETRY_ATTEMPTS the batch goes to a DeadLetterSpool on disk, in the form
+# it failed in:
+#
+#   <uuid>.arrow           the batch itself (Arrow IPC), if it could not be encoded
+#   <file>.parquet         the encoded file, if it could not be PUT
+#   <uuid>.notify.json     staged file names Snowpipe was not notified of
+#   <uuid>.rejected.jsonl  input lines the parser rejected (not JSON, or a
+#                          NOT NULL field missing)
+#
+# The loaders' --replay-dlq runs the spool through the pipeline again, all
+# but the rejected records, which need fixing first.
+# ---------------------------------------------------------------------------
+
+RETRY_ATTEMPTS = 5      # attempts of a stage before its batch is dead-lettered
+RETRY_BASE = 2.0        # seconds; the backoff doubles per attempt ...
+RETRY_CAP = 60.0        # ... up to this many
+
+
+class RetryQueue:
+    """Runs retry callbacks after a jittered exponential backoff, on a background thread.
+
+    failed() is called after each failed attempt: it schedules retry, or
+    calls dead once max_attempts have been made. close() waits for every
+    scheduled retry, including the ones scheduled by retries.
+    """
+
+    def __init__(self, max_attempts=RETRY_ATTEMPTS, base=RETRY_BASE, cap=RETRY_CAP):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.retried = 0
+        self.dead = 0
+        self._due = []          # heap of (due time, seq, retry)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def backoff(self, attempt):
+        # "full jitter": uniform in [0, min(cap, base * 2^(attempt-1))]
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+    def failed(self, what, attempt, retry, dead):
+        if attempt >= self.max_attempts:
+            logging.error(f"{what} failed {attempt} times, dead-lettering it")
+            with self._cond:
+                self.dead += 1
+            dead()
+            return
+        delay = self.backoff(attempt)
+        logging.warning(f"{what} failed (attempt {attempt}/{self.max_attempts}), retrying in {delay:.1f}s")
+        with self._cond:
+            self.retried += 1
+            heapq.heappush(self._due, (time.monotonic() + delay, next(self._seq), retry))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._due and self._due[0][0] <= now:
+                        retry = heapq.heappop(self._due)[2]
+                        break
+                    if self._closing and not self._due:
+                        return
+                    self._cond.wait(self._due[0][0] - now if self._due else None)
+            try:
+                retry()
+            except Exception:
+                logging.exception("Retry failed")
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        logging.info(f"Retries: {self.retried} scheduled, {self.dead} dead-lettered")
+
+
+class DeadLetterSpool:
+    """A directory of batches that failed every retry; files are written atomically."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, write):
+        partial = self._path(name + ".partial")
+        with open(partial, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self._path(name))
+        logging.warning(f"Dead-lettered {self._path(name)}")
+
+    def add_batch(self, table):
+        def write(f):
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        self._write(f"{uuid.uuid1()}.arrow", write)
+
+    def add_file(self, staged):
+        """Keep an encoded StagedParquet; a spilled file is moved in, so discard() leaves it alone."""
+        if staged.body is not None:
+            self._write(staged.file_name, lambda f: f.write(staged.body.getbuffer()))
+        elif staged.path != self._path(staged.file_name):
+            shutil.move(staged.path, self._path(staged.file_name))
+            logging.warning(f"Dead-lettered {self._path(staged.file_name)}")
+        staged.path = None
+
+    def add_notification(self, file_names):
+        self._write(f"{uuid.uuid1()}.notify.json", lambda f: f.write(json.dumps(file_names).encode()))
+
+    def add_records(self, lines):
+        self._write(f"{uuid.uuid1()}.rejected.jsonl", lambda f: f.writelines(line + b"\n" for line in lines))
+
+    def entries(self):
+        """Paths of the spooled entries, oldest first."""
+        names = [n for n in os.listdir(self.directory) if not n.endswith(".partial")]
+        return sorted((self._path(n) for n in names), key=os.path.getmtime)
+
+    @staticmethod
+    def read_batch(path):
+        with pa.OSFile(path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def read_notification(path):
+        with open(path) as f:
+            return json.load(f)
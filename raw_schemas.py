@@ -0,0 +1,303 @@
+import os
+import re
+import sys
+
+import numpy as np
+import pyarrow as pa
+
+# ---------------------------------------------------------------------------
+# Arrow mirrors of the RAW tables in PIPELINE_SETUP.sql (section E).
+# Column names are the Snowflake names, types follow the DDL:
+#   STRING -> string, NUMBER(p,2) -> decimal128(p,2), NUMBER(10,0) -> int64,
+#   BOOLEAN -> bool, DATE -> date32
+# The VARIANT columns are not part of the generated data and are left out of
+# these; the loaders fill them with lineage (LINEAGE_SCHEMA): METADATA with a
+# struct, which loads as an OBJECT, and carbon's RAW_PAYLOAD with the input
+# line as a string (a JSON string in the VARIANT: PARSE_JSON(RAW_PAYLOAD::STRING)).
+#
+# The schemas are pinned here and registered in RAW_SCHEMAS; check_registry()
+# parses the CREATE TABLE statements of PIPELINE_SETUP.sql with the same
+# mapping and reports any column where the two disagree, and schema_drift()
+# compares a batch against its pinned schema (the loaders do both before
+# anything is PUT). `python raw_schemas.py` runs the DDL check.
+# ---------------------------------------------------------------------------
+
+PIPELINE_SETUP_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PIPELINE_SETUP.sql")
+
+ORDERS_TABLE = "RAW_CLIENT_SUPPORT_ORDERS_PY_SNOWPIPE"
+CARBON_TABLE = "RAW_CARBON_EMISSIONS_PY_SNOWPIPE"
+
+ORDERS_SCHEMA = pa.schema([
+    pa.field("TXID", pa.string(), nullable=False),
+    pa.field("RFID", pa.string()),
+    pa.field("CUSTOMER_ID", pa.string()),
+    pa.field("PRODUCT_ID", pa.string()),
+    pa.field("ITEM", pa.string()),
+    pa.field("BAG_SIZE", pa.string()),
+    pa.field("UNIT_PRICE", pa.decimal128(10, 2)),
+    pa.field("QUANTITY", pa.int64()),
+    pa.field("TOTAL_PRICE", pa.decimal128(12, 2)),
+    pa.field("ORIGIN_COUNTRY", pa.string()),
+    pa.field("FAIR_TRADE_CERTIFIED", pa.bool_()),
+    pa.field("ORGANIC_CERTIFIED", pa.bool_()),
+    pa.field("PURCHASE_TIME", pa.date32(), nullable=False),
+    pa.field("SHIPPED_DATE", pa.date32()),
+    pa.field("DELIVERED_DATE", pa.date32()),
+    pa.field("REGION", pa.string()),
+    pa.field("NAME", pa.string()),
+    pa.field("STREET_ADDRESS", pa.string()),
+    pa.field("CITY", pa.string()),
+    pa.field("COUNTRY", pa.string()),
+    pa.field("POSTALCODE", pa.string()),
+    pa.field("PHONE", pa.string()),
+    pa.field("EMAIL", pa.string()),
+    pa.field("WAREHOUSE", pa.string()),
+    pa.field("SHIPPING_METHOD", pa.string()),
+    pa.field("DELIVERY_STATUS", pa.string()),
+    pa.field("PAYMENT_METHOD", pa.string()),
+    pa.field("PAYMENT_STATUS", pa.string()),
+    pa.field("DELIVERY_DELAY_DAYS", pa.int64()),
+    pa.field("CARBON_SCORE", pa.decimal128(10, 2)),
+])
+
+CARBON_SCHEMA = pa.schema([
+    pa.field("RECORD_ID", pa.string(), nullable=False),
+    pa.field("REPORTING_MONTH", pa.date32()),
+    pa.field("WAREHOUSE_ID", pa.string()),
+    pa.field("WAREHOUSE_NAME", pa.string()),
+    pa.field("WAREHOUSE_COUNTRY", pa.string()),
+    pa.field("ORIGIN_COUNTRY", pa.string()),
+    pa.field("DISTANCE_CLASS", pa.string()),
+    pa.field("SHIPPING_METHOD", pa.string()),
+    pa.field("SHIPMENTS_COUNT", pa.int64()),
+    pa.field("AVG_BATCH_SIZE_KG", pa.decimal128(10, 2)),
+    pa.field("ESTIMATED_EMISSIONS_KGCO2E", pa.decimal128(12, 2)),
+])
+
+
+RAW_SCHEMAS = {
+    ORDERS_TABLE: ORDERS_SCHEMA,
+    CARBON_TABLE: CARBON_SCHEMA,
+}
+
+VARIANT_COLUMNS = {
+    ORDERS_TABLE: ["METADATA"],
+    CARBON_TABLE: ["RAW_PAYLOAD", "METADATA"],
+}
+
+# timestamps are ISO 8601 UTC strings, e.g. 2026-06-01T12:00:00.123Z
+METADATA_TYPE = pa.struct([
+    pa.field("loader_host", pa.string()),
+    pa.field("loader_run", pa.string()),
+    pa.field("batch", pa.int64()),
+    pa.field("staged_file", pa.string()),
+    pa.field("read_at", pa.string()),       # when the record's input block was read
+    pa.field("cut_at", pa.string()),        # when its batch was cut
+    pa.field("staged_at", pa.string()),     # when the batch was encoded for the PUT
+])
+
+LINEAGE_SCHEMA = pa.schema([
+    pa.field("RAW_PAYLOAD", pa.string()),
+    pa.field("METADATA", METADATA_TYPE),
+])
+
+
+class SchemaDriftError(ValueError):
+    pass
+
+
+SEMI_STRUCTURED = ("VARIANT", "OBJECT", "ARRAY")
+
+
+def arrow_type(sql_type):
+    """Arrow type of a Snowflake column type, None for the semi-structured ones."""
+    m = re.fullmatch(r"(\w+)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?", sql_type.strip())
+    if not m:
+        raise SchemaDriftError(f"Unreadable column type {sql_type!r}")
+    name = m.group(1).upper()
+    if name in ("STRING", "VARCHAR", "TEXT", "CHAR", "CHARACTER"):
+        return pa.string()
+    if name in ("NUMBER", "DECIMAL", "NUMERIC"):
+        precision = int(m.group(2) or 38)
+        scale = int(m.group(3) or 0)
+        return pa.int64() if scale == 0 and precision <= 18 else pa.decimal128(precision, scale)
+    if name in ("INT", "INTEGER", "BIGINT", "SMALLINT"):
+        return pa.int64()
+    if name in ("FLOAT", "DOUBLE", "REAL"):
+        return pa.float64()
+    if name == "BOOLEAN":
+        return pa.bool_()
+    if name == "DATE":
+        return pa.date32()
+    if name in SEMI_STRUCTURED:
+        return None
+    raise SchemaDriftError(f"No Arrow mapping for column type {sql_type!r}")
+
+
+def _split_columns(body):
+    # split a CREATE TABLE body at the commas outside parentheses
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(body):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def ddl_columns(sql):
+    """(name, type, NOT NULL) of every column of the CREATE TABLE (...) statements in sql, by table.
+
+    CREATE TABLE ... LIKE is skipped; names are upper case.
+    """
+    sql = re.sub(r"--[^\n]*", "", sql)
+    tables = {}
+    for m in re.finditer(r"CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)\s*\(",
+                         sql, re.IGNORECASE):
+        depth, end = 1, m.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(sql[end], 0)
+            end += 1
+        columns = []
+        for column in _split_columns(sql[m.end():end - 1]):
+            if re.match(r"(PRIMARY|UNIQUE|FOREIGN|CONSTRAINT)\b", column, re.IGNORECASE):
+                continue
+            name, sql_type, rest = re.match(r"(\w+)\s+(\w+(?:\s*\([\d\s,]*\))?)(.*)", column, re.DOTALL).groups()
+            not_null = re.search(r"\bNOT\s+NULL\b", rest, re.IGNORECASE) is not None
+            columns.append((name.upper(), sql_type, not_null))
+        tables[m.group(1).split(".")[-1].upper()] = columns
+    return tables
+
+
+def ddl_schemas(sql):
+    """Arrow schemas of the CREATE TABLE (...) statements in sql, by table name.
+
+    Semi-structured columns are left out, as in the pinned schemas; NOT NULL
+    columns are non-nullable.
+    """
+    schemas = {}
+    for table, columns in ddl_columns(sql).items():
+        fields = []
+        for name, sql_type, not_null in columns:
+            type_ = arrow_type(sql_type)
+            if type_ is not None:
+                fields.append(pa.field(name, type_, nullable=not not_null))
+        schemas[table] = pa.schema(fields)
+    return schemas
+
+
+def schema_drift(actual, expected, optional=None):
+    """Differences of schema actual from expected, as messages (empty if none).
+
+    Columns of the optional schema may follow the expected ones.
+    """
+    optional = optional or pa.schema([])
+    drift = []
+    names = set(actual.names)
+    for f in expected:
+        if f.name not in names:
+            drift.append(f"{f.name}: missing")
+            continue
+        a = actual.field(f.name)
+        if a.type != f.type:
+            drift.append(f"{f.name}: {a.type}, expected {f.type}")
+        elif a.nullable and not f.nullable:
+            drift.append(f"{f.name}: nullable, expected NOT NULL")
+    for a in actual:
+        if a.name in expected.names:
+            continue
+        if a.name not in optional.names:
+            drift.append(f"{a.name}: not in the table")
+        elif a.type != optional.field(a.name).type:
+            drift.append(f"{a.name}: {a.type}, expected {optional.field(a.name).type}")
+    names = [name for name in actual.names if name not in optional.names or name in expected.names]
+    if not drift and names != expected.names:
+        drift.append(f"column order {names}, expected {expected.names}")
+    return drift
+
+
+def check_registry(path=PIPELINE_SETUP_SQL):
+    """Check the pinned RAW_SCHEMAS against the DDL in path; SchemaDriftError if they differ."""
+    with open(path) as f:
+        sql = f.read()
+    ddl = ddl_schemas(sql)
+    columns = ddl_columns(sql)
+    problems = []
+    for table, schema in RAW_SCHEMAS.items():
+        if table not in ddl:
+            problems.append(f"{table}: no CREATE TABLE in {path}")
+            continue
+        problems += [f"{table}.{message}" for message in schema_drift(schema, ddl[table])]
+        variants = [name for name, sql_type, _ in columns[table] if arrow_type(sql_type) is None]
+        if variants != VARIANT_COLUMNS[table]:
+            problems.append(f"{table}: semi-structured columns {variants}, expected {VARIANT_COLUMNS[table]}")
+    if problems:
+        raise SchemaDriftError("Pinned RAW schemas differ from the DDL: " + "; ".join(problems))
+
+
+def decimal_array(values, type_, mask=None):
+    """decimal128 array from floats, built from the unscaled int128 words directly."""
+    scaled = np.asarray(values, dtype=np.float64) * 10 ** type_.scale
+    if mask is not None:
+        scaled = np.where(mask, 0.0, scaled)
+    unscaled = np.rint(scaled).astype(np.int64)
+    words = np.empty((len(unscaled), 2), dtype=np.int64)
+    words[:, 0] = unscaled
+    words[:, 1] = unscaled >> 63   # sign extension into the high word
+    validity = None
+    if mask is not None and mask.any():
+        validity = pa.array(~np.asarray(mask)).buffers()[1]
+    return pa.Array.from_buffers(type_, len(unscaled), [validity, pa.py_buffer(words.tobytes())])
+
+
+def fixed_width_string_array(text):
+    """string array from an (n, width) array of ASCII bytes, without per-row objects."""
+    n, width = text.shape
+    offsets = np.arange(0, (n + 1) * width, width, dtype=np.int32)
+    return pa.Array.from_buffers(
+        pa.string(), n, [None, pa.py_buffer(offsets.tobytes()), pa.py_buffer(np.ascontiguousarray(text).tobytes())]
+    )
+
+
+def date_array(days, mask=None):
+    """date32 array from day numbers since 1970-01-01."""
+    return pa.array(np.asarray(days, dtype=np.int32), mask=mask).cast(pa.date32())
+
+
+def iso_dates_to_days(values):
+    """(days since epoch, missing mask) for a list of ISO date strings / None."""
+    parsed = np.array(values, dtype="datetime64[D]")
+    missing = np.isnat(parsed)
+    return np.where(missing, 0, parsed.astype(np.int64)), missing
+
+
+def column_array(values, type_):
+    """Arrow array of the given type from a list of JSON-style Python values."""
+    if pa.types.is_decimal(type_):
+        mask = np.array([v is None for v in values])
+        return decimal_array([0.0 if v is None else v for v in values], type_, mask)
+    if pa.types.is_date32(type_):
+        days, missing = iso_dates_to_days(values)
+        return date_array(days, missing)
+    return pa.array(values, type=type_)
+
+
+def records_to_batch(records, schema):
+    """RecordBatch from generator records (lower/mixed-case keys as in the JSON output)."""
+    keys = {k.upper(): k for k in records[0]} if records else {}
+    return pa.RecordBatch.from_arrays(
+        [column_array([r.get(keys.get(f.name)) for r in records], f.type) for f in schema],
+        schema=schema,
+    )
+
+
+if __name__ == "__main__":
+    try:
+        check_registry(sys.argv[1] if len(sys.argv) > 1 else PIPELINE_SETUP_SQL)
+    except SchemaDriftError as e:
+        sys.exit(str(e))
+    print(f"Pinned schemas match the DDL for {', '.join(RAW_SCHEMAS)}")
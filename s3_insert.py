@@ -1,8 +1,30 @@
 import boto3
-import subprocess
+import argparse
+import base64
+import hashlib
 import json
-import sys
+import os
+import threading
+import uuid
+import zlib
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_generator_carbon
+import data_generator_orders
+from generator_shards import resolve_seed
+from raw_schemas import CARBON_SCHEMA, ORDERS_SCHEMA
+
+try:
+    import zstandard
+except ImportError:  # only needed for --codec zstd
+    zstandard = None
 
 # ---------------------------
 # CONFIG - Runs data generators to push into AWS S3
@@ -11,52 +33,460 @@ BUCKET_NAME = "yuggietl"
 ORDERS_KEY_PREFIX = "raw/orders/"
 CARBON_KEY_PREFIX = "raw/carbon_emissions/"
 
-# location of your generators
-ORDERS_SCRIPT = "Orders_generator.py"
-CARBON_SCRIPT = "Carbon_footprint_generator.py"
-
-# S3 client
-s3 = boto3.client("s3")
-
-def run_generator(script, count):
-    """Run a generator script and capture JSON lines output."""
-    result = subprocess.run(
-        ["python", script, str(count)],
-        capture_output=True,
-        text=True,
-        check=True
-    )
-    # each line is JSON
-    lines = [line for line in result.stdout.strip().split("\n") if line.strip()]
-    return lines
-
-def upload_to_s3(lines, prefix, dataset_name):
-    """Upload JSONL to S3 with timestamped key."""
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    key = f"{prefix}{dataset_name}_{timestamp}.jsonl"
-
-    body = "\n".join(lines)
-
-    s3.put_object(
-        Bucket=BUCKET_NAME,
-        Key=key,
-        Body=body.encode("utf-8")
-    )
-    print(f"✅ Uploaded {len(lines)} records to s3://{BUCKET_NAME}/{key}")
+# multipart upload: memory use is about (MAX_IN_FLIGHT + 1) * PART_SIZE per object
+PART_SIZE = 16 * 1024 * 1024      # S3 minimum is 5 MiB (except the last part)
+MAX_IN_FLIGHT = 4
+
+# object layout: files rolled at TARGET_FILE_SIZE (compressed) under dt=/hour= partitions
+TARGET_FILE_SIZE = 128 * 1024 * 1024
+CODECS = ["none", "gzip", "zstd"]
+FORMATS = ["jsonl", "parquet"]
+JSONL_EXTENSIONS = {"none": ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+PARQUET_COMPRESSION = {"none": "NONE", "gzip": "GZIP", "zstd": "ZSTD"}
+
+# local log of confirmed objects, used by --resume to skip what is already in S3
+MANIFEST_PATH = "s3_upload_manifest.jsonl"
+
+# S3 client, shared by every dataset thread: its connection pool must cover
+# all parts in flight (datasets * MAX_IN_FLIGHT)
+MAX_POOL_CONNECTIONS = 32
+s3 = boto3.client("s3", config=Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+))
+
+def object_key(prefix, dataset_name, extension, now=None):
+    """dt=/hour= partitioned key with a unique suffix, so runs in the same second never collide."""
+    now = now or datetime.utcnow()
+    return (f"{prefix}dt={now:%Y-%m-%d}/hour={now:%H}/"
+            f"{dataset_name}_{now:%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:12]}{extension}")
+
+class MultipartUpload:
+    """Writable file-like object backed by an S3 multipart upload.
+
+    Bytes are cut into part_size parts and uploaded on a thread pool; at most
+    max_in_flight parts are buffered or in transit at once, so memory stays
+    flat regardless of the object size. client defaults to the module's s3
+    client; any other boto3 S3 client works (e.g. one created under moto).
+
+    Every part is sent with its CRC32, which S3 checks on receipt, and the
+    object's composite checksum is checked on completion. Unlike the
+    multipart ETag, this holds on SSE-KMS and SSE-C buckets too.
+    """
+
+    def __init__(self, key, client=None, part_size=PART_SIZE, max_in_flight=MAX_IN_FLIGHT):
+        self.key = key
+        self.client = client or s3
+        self.part_size = part_size
+        self.upload_id = self.client.create_multipart_upload(
+            Bucket=BUCKET_NAME, Key=key, ChecksumAlgorithm="CRC32"
+        )["UploadId"]
+        self.closed = False
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._futures = []
+        self._buf = bytearray()
+        self._written = 0
+        self._md5 = hashlib.md5()
+        self.etag = None
+
+    def _upload_part(self, number, body):
+        try:
+            crc = zlib.crc32(body).to_bytes(4, "big")
+            checksum = base64.b64encode(crc).decode()
+            resp = self.client.upload_part(
+                Bucket=BUCKET_NAME, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=body,
+                ChecksumAlgorithm="CRC32", ChecksumCRC32=checksum,
+            )
+            return {"PartNumber": number, "ETag": resp["ETag"], "ChecksumCRC32": checksum}, crc
+        finally:
+            self._slots.release()
+
+    def _submit(self, body):
+        self._slots.acquire()   # blocks the writer while max_in_flight parts are pending
+        self._futures.append(self._pool.submit(self._upload_part, len(self._futures) + 1, body))
+
+    def write(self, data):
+        self._buf += data
+        self._written += len(data)
+        self._md5.update(data)
+        while len(self._buf) >= self.part_size:
+            part = bytes(self._buf[:self.part_size])
+            del self._buf[:self.part_size]
+            self._submit(part)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def md5(self):
+        """md5 of the whole object body, as written."""
+        return self._md5.hexdigest()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buf or not self._futures:
+                self._submit(bytes(self._buf))
+            results = [f.result() for f in self._futures]
+            resp = self.client.complete_multipart_upload(
+                Bucket=BUCKET_NAME, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": [part for part, _ in results]},
+            )
+            # the composite checksum is the CRC32 of the part CRC32s plus "-<parts>"
+            expected = base64.b64encode(zlib.crc32(b"".join(c for _, c in results)).to_bytes(4, "big")).decode()
+            checksum = resp.get("ChecksumCRC32")
+            if checksum is not None and checksum.split("-")[0] != expected:
+                raise IOError(f"{self.key}: checksum {checksum} does not match the uploaded parts {expected}")
+            self.etag = resp["ETag"]
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._pool.shutdown()
+        self.closed = True
+
+    def abort(self):
+        self.closed = True
+        self._pool.shutdown(cancel_futures=True)
+        self.client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=self.key, UploadId=self.upload_id)
+
+def new_compressor(codec):
+    if codec == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31: gzip container
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("--codec zstd needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return None
+
+def completed_file(upload, first_record, records):
+    """Manifest entry for a closed MultipartUpload holding records [first_record, end_record)."""
+    return {
+        "key": upload.key,
+        "bytes": upload.tell(),
+        "md5": upload.md5(),
+        "etag": upload.etag,
+        "first_record": first_record,
+        "end_record": first_record + records,
+    }
+
+class RollingWriter:
+    """Shared bookkeeping of the rolling writers.
+
+    Completed objects are listed in .files and passed to on_file as soon as
+    they are confirmed; on_open gets every MultipartUpload as it is started.
+    first_record numbers the records of a resumed run.
+    """
+
+    def __init__(self, prefix, dataset_name, target_size=TARGET_FILE_SIZE, first_record=0, on_file=None,
+                 on_open=None, **upload_opts):
+        self.prefix = prefix
+        self.dataset_name = dataset_name
+        self.target_size = target_size
+        self.upload_opts = upload_opts
+        self.on_file = on_file
+        self.on_open = on_open
+        self.next_record = first_record
+        self.files = []       # completed_file() entries
+        self._upload = None
+        self._records = 0
+
+    def _new_upload(self, extension):
+        self._upload = MultipartUpload(object_key(self.prefix, self.dataset_name, extension), **self.upload_opts)
+        if self.on_open:
+            self.on_open(self._upload)
+        return self._upload
+
+    def _finish(self, entry):
+        self._upload = None
+        self.next_record = entry["end_record"]
+        self.files.append(entry)
+        if self.on_file:
+            self.on_file(entry)
+
+    def abort(self):
+        if self._upload is not None:
+            self._upload.abort()
+            self._upload = None
+
+class RollingJsonlWriter(RollingWriter):
+    """JSONL bytes -> compressed objects of about target_size, cut at line boundaries."""
+
+    def __init__(self, prefix, dataset_name, codec="gzip", target_size=TARGET_FILE_SIZE, **opts):
+        super().__init__(prefix, dataset_name, target_size, **opts)
+        self.codec = codec
+        self._compressor = None
+        self._open_line = False
+
+    def _open(self):
+        self._new_upload(JSONL_EXTENSIONS[self.codec])
+        self._compressor = new_compressor(self.codec)
+        self._records = 0
+
+    def _feed(self, data):
+        if self._upload is None:
+            self._open()
+        self._upload.write(self._compressor.compress(data) if self._compressor else data)
+        self._records += data.count(b"\n")
+        self._open_line = not data.endswith(b"\n")
+
+    def _roll(self):
+        if self._compressor:
+            self._upload.write(self._compressor.flush())
+        self._upload.close()
+        self._finish(completed_file(self._upload, self.next_record, self._records))
+
+    def write(self, data):
+        # only roll right after a newline, so no record is split across objects
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            self._feed(data[:cut])
+            if self._upload.tell() >= self.target_size:
+                self._roll()
+        if cut < len(data):
+            self._feed(data[cut:])
+
+    def close(self):
+        if self._upload is not None:
+            # a last record without a trailing newline still counts
+            self._records += self._open_line
+            self._roll()
+
+class RollingParquetWriter(RollingWriter):
+    """Arrow record batches -> Parquet objects of about target_size, one row group per batch."""
+
+    def __init__(self, prefix, dataset_name, schema, codec="gzip", target_size=TARGET_FILE_SIZE, **opts):
+        super().__init__(prefix, dataset_name, target_size, **opts)
+        self.schema = schema
+        self.compression = PARQUET_COMPRESSION[codec]
+        self._writer = None
+
+    def write_batch(self, batch):
+        if self._upload is None:
+            self._writer = pq.ParquetWriter(self._new_upload(".parquet"), self.schema, compression=self.compression)
+            self._records = 0
+        self._writer.write_table(pa.Table.from_batches([batch]))
+        self._records += batch.num_rows
+        if self._upload.tell() >= self.target_size:
+            self.close()
+
+    def close(self):
+        if self._upload is not None:
+            self._writer.close()
+            self._upload.close()
+            self._finish(completed_file(self._upload, self.next_record, self._records))
+
+class UploadManifest:
+    """Append-only JSONL log of runs and of the objects they have confirmed in S3.
+
+    Lines are {"type": "run", ...} with the run's arguments, seed and as-of
+    time, {"type": "upload", ...} per multipart upload started (key and
+    upload_id, plus run and dataset), {"type": "object", ...} per completed
+    object (completed_file() fields plus run and dataset) and {"type":
+    "done", ...} once a run is complete. Every line is fsynced, so a crash loses at most the object that
+    was being written.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+    def append(self, entry):
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries.append(entry)
+
+    def unfinished_run(self, params):
+        """Latest run started with the same params that never completed, or None."""
+        done = {e["run"] for e in self.entries if e["type"] == "done"}
+        runs = [e for e in self.entries if e["type"] == "run" and e["params"] == params and e["run"] not in done]
+        return runs[-1] if runs else None
+
+    def confirmed_records(self, run_id, dataset_name, client=None):
+        """Records [0, n) of a dataset that are covered by objects still present in S3.
+
+        Objects are checked with a HEAD request (size and ETag) in record
+        order, newest upload of a range first (a resumed run uploads lost
+        ranges again); the first range without an object present ends the
+        confirmed range.
+        """
+        client = client or s3
+        by_start = {}
+        for e in self.entries:
+            if e["type"] == "object" and e["run"] == run_id and e["dataset"] == dataset_name:
+                by_start.setdefault(e["first_record"], []).append(e)
+        confirmed = 0
+        while confirmed in by_start:
+            present = next((e for e in reversed(by_start[confirmed]) if self._in_s3(client, e)), None)
+            if present is None:
+                break
+            confirmed = present["end_record"]
+        return confirmed
+
+    def abort_stale_uploads(self, run_id, dataset_name, client=None):
+        """Abort the multipart uploads of a dataset that an interrupted run left open; returns their keys.
+
+        S3 keeps (and bills) the parts of an upload until it is completed or
+        aborted. Every upload started is in the manifest; those without a
+        completed object are looked up by key and aborted if still open.
+        """
+        client = client or s3
+        entries = [e for e in self.entries if e.get("run") == run_id and e.get("dataset") == dataset_name]
+        completed = {e["key"] for e in entries if e["type"] == "object"}
+        aborted = []
+        for e in entries:
+            if e["type"] != "upload" or e["key"] in completed:
+                continue
+            listing = client.list_multipart_uploads(Bucket=BUCKET_NAME, Prefix=e["key"])
+            for upload in listing.get("Uploads", []):
+                if upload["Key"] == e["key"] and upload["UploadId"] == e["upload_id"]:
+                    client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=e["key"], UploadId=e["upload_id"])
+                    aborted.append(e["key"])
+        return aborted
+
+    @staticmethod
+    def _in_s3(client, entry):
+        try:
+            head = client.head_object(Bucket=BUCKET_NAME, Key=entry["key"])
+        except ClientError:
+            return False
+        return head["ContentLength"] == entry["bytes"] and head["ETag"] == entry["etag"]
+
+def upload_records(chunks, prefix, dataset_name, schema, fmt="jsonl", codec="gzip",
+                   target_size=TARGET_FILE_SIZE, **opts):
+    """Upload generated chunks into size-rolled objects under prefix/dt=.../hour=.../
+
+    chunks are JSONL text for fmt="jsonl" and Arrow RecordBatches for
+    fmt="parquet", as yielded by the generators' iter_* functions. opts are
+    passed to the rolling writer (first_record, on_file, on_open) and MultipartUpload.
+    """
+    if fmt == "parquet":
+        writer = RollingParquetWriter(prefix, dataset_name, schema, codec, target_size, **opts)
+        write = writer.write_batch
+    else:
+        writer = RollingJsonlWriter(prefix, dataset_name, codec, target_size, **opts)
+        write = lambda text: writer.write(text.encode("utf-8"))
+    try:
+        for chunk in chunks:
+            write(chunk)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    for entry in writer.files:
+        print(f"✅ Uploaded records {entry['first_record']}-{entry['end_record'] - 1} "
+              f"({entry['bytes']} bytes) to s3://{BUCKET_NAME}/{entry['key']}")
+    return writer.files
+
+def upload_dataset(manifest, run_id, dataset_name, chunks_from, count, batch_rows, prefix, schema, **opts):
+    """Upload one dataset of a manifest run, starting after its records already confirmed in S3.
+
+    chunks_from(start_shard=...) returns the generator's chunks from that shard
+    on; objects roll only between chunks, so confirmed ranges end on a shard.
+    Multipart uploads left open by an interrupted attempt are aborted first.
+    A client in opts is used for the uploads and for checking what is in S3.
+    """
+    stale = manifest.abort_stale_uploads(run_id, dataset_name, opts.get("client"))
+    if stale:
+        print(f"🧹 {dataset_name}: aborted {len(stale)} unfinished multipart uploads")
+    done = manifest.confirmed_records(run_id, dataset_name, opts.get("client"))
+    if done >= count:
+        print(f"⏭ {dataset_name}: all {count} records already in S3")
+        return []
+    start_shard = done // batch_rows
+    if done:
+        print(f"↪ {dataset_name}: {done} records already in S3, resuming")
+
+    def record_upload(upload):
+        manifest.append({"type": "upload", "run": run_id, "dataset": dataset_name,
+                         "key": upload.key, "upload_id": upload.upload_id})
+
+    def record_file(entry):
+        manifest.append({"type": "object", "run": run_id, "dataset": dataset_name, **entry})
+
+    return upload_records(chunks_from(start_shard=start_shard), prefix, dataset_name, schema,
+                          first_record=start_shard * batch_rows, on_file=record_file, on_open=record_upload,
+                          **opts)
 
 if __name__ == "__main__":
     # Read command-line arguments
-    if len(sys.argv) != 3:
-        print("Usage: python s3_insert.py <num_orders> <num_carbon_records>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate orders and carbon records and upload them to S3")
+    parser.add_argument("num_orders", type=int)
+    parser.add_argument("num_carbon_records", type=int)
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--codec", choices=CODECS, default="gzip")
+    parser.add_argument("--target-file-mb", type=int, default=TARGET_FILE_SIZE // (1024 * 1024),
+                        help="roll to a new object once this many (compressed) MiB are written")
+    parser.add_argument("--part-size-mb", type=int, default=PART_SIZE // (1024 * 1024),
+                        help="multipart part size in MiB (min 5)")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help="parts buffered or uploading at once, per dataset")
+    parser.add_argument("--seed", type=int, default=None, help="generator seed for reproducible uploads")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="local log of runs and uploaded objects")
+    parser.add_argument("--resume", action="store_true",
+                        help="finish the last interrupted run with the same arguments (and its seed), "
+                             "uploading only the objects missing from S3")
+    args = parser.parse_args()
+    upload_opts = {
+        "fmt": args.format,
+        "codec": args.codec,
+        "target_size": args.target_file_mb * 1024 * 1024,
+        "part_size": max(5, args.part_size_mb) * 1024 * 1024,
+        "max_in_flight": args.max_in_flight,
+    }
 
-    ORDER_COUNT = int(sys.argv[1])
-    CARBON_COUNT = int(sys.argv[2])
+    # a run is reproducible from its seed and as-of time, so a resumed run
+    # regenerates exactly the records that are still missing
+    manifest = UploadManifest(args.manifest)
+    params = {
+        "num_orders": args.num_orders,
+        "num_carbon_records": args.num_carbon_records,
+        "format": args.format,
+        "codec": args.codec,
+        "target_size": upload_opts["target_size"],
+        "batch_rows": [data_generator_orders.BATCH_ROWS, data_generator_carbon.BATCH_ROWS],
+    }
+    run = manifest.unfinished_run(params) if args.resume else None
+    if run is None:
+        if args.resume:
+            print("No unfinished run with these arguments in the manifest, starting a new one")
+        run = {"type": "run", "run": uuid.uuid4().hex, "params": params,
+               "seed": resolve_seed(args.seed), "as_of": datetime.utcnow().isoformat()}
+        manifest.append(run)
+    seed = run["seed"]
+    as_of = datetime.fromisoformat(run["as_of"])
 
-    # Generate & upload orders
-    order_lines = run_generator(ORDERS_SCRIPT, ORDER_COUNT)
-    upload_to_s3(order_lines, ORDERS_KEY_PREFIX, "orders")
+    # generators run in this process; parquet uploads take their Arrow batches directly
+    gen_format = "arrow" if args.format == "parquet" else "jsonl"
+    data_generator_orders.configure(as_of=as_of, seed=seed)
+    data_generator_carbon.configure(as_of=as_of)
+    orders = partial(data_generator_orders.iter_client_support, args.num_orders, gen_format, seed=seed)
+    carbon = partial(data_generator_carbon.iter_carbon_reports, args.num_carbon_records, gen_format, seed=seed + 1)
 
-    # Generate & upload carbon emissions
-    carbon_lines = run_generator(CARBON_SCRIPT, CARBON_COUNT)
-    upload_to_s3(carbon_lines, CARBON_KEY_PREFIX, "carbon_emissions")
+    # Generate & upload orders and carbon emissions concurrently
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = [
+            pool.submit(upload_dataset, manifest, run["run"], "orders", orders,
+                        args.num_orders, data_generator_orders.BATCH_ROWS, ORDERS_KEY_PREFIX, ORDERS_SCHEMA,
+                        **upload_opts),
+            pool.submit(upload_dataset, manifest, run["run"], "carbon_emissions", carbon,
+                        args.num_carbon_records, data_generator_carbon.BATCH_ROWS, CARBON_KEY_PREFIX, CARBON_SCHEMA,
+                        **upload_opts),
+        ]
+        for job in jobs:
+            job.result()
+    manifest.append({"type": "done", "run": run["run"]})
@@ -0,0 +1,21 @@
+import math
+
+import numpy as np
+import pytest
+
+from py_snowpipe_dedup import WindowedBloomFilter
+
+LOOKUPS = 2_000_000
+
+
+@pytest.mark.parametrize("fp_rate, memory_mb", [(0.001, 8), (0.01, 2), (0.0001, 4)])
+def test_false_positive_rate_within_budget_when_full(fp_rate, memory_mb):
+    rng = np.random.default_rng(23)
+    bloom = WindowedBloomFilter(fp_rate, memory_mb * 1024 * 1024)
+    # fill every generation to capacity: the most keys the filter ever holds
+    bloom.add(rng.integers(0, 2 ** 63, len(bloom.generations) * bloom.capacity, dtype=np.int64).view(np.uint64))
+    assert bloom.rotations == len(bloom.generations) - 1 and bloom.count == bloom.capacity
+
+    found = bloom.contains(rng.integers(0, 2 ** 63, LOOKUPS, dtype=np.int64).view(np.uint64))
+    # fresh keys: every hit is a false positive; allow 3 standard errors of sampling noise
+    assert found.mean() <= fp_rate + 3 * math.sqrt(fp_rate / LOOKUPS)